@@ -1,64 +1,43 @@
 import streamlit as st
-import pandas as pd
-import io
 
-# Initialize session state
-if "products" not in st.session_state:
-    st.session_state.products = []
-    st.session_state.current_product = 0
-    st.session_state.file_uploaded = False  
-
-def load_excel_data(file):
-    """Load Excel or CSV data and store it in session state"""
-    try:
-        # Detect file format
-        if file.name.endswith(".csv"):
-            df = pd.read_csv(file)
-        else:
-            df = pd.read_excel(file)
-
-        # Standardize column names
-        column_mapping = {"image": "image link"}  
-        df.rename(columns=column_mapping, inplace=True)
-
-        # Required columns
-        required_columns = {"name", "image link", "details"}
-        missing_columns = required_columns - set(df.columns)
-        if missing_columns:
-            st.error(f"❌ خطأ: الأعمدة المفقودة: {', '.join(missing_columns)}")
-            return
-
-        # Convert dataframe to a list of dictionaries
-        products = df.to_dict("records")
-        if not products:
-            st.error("⚠️ الملف فارغ أو لا يحتوي على منتجات.")
-            return
-
-        # Store in session state
-        st.session_state.products = products
-        st.session_state.current_product = 0  
-        st.session_state.file_uploaded = True  
-        st.rerun()
-
-    except Exception as e:
-        st.error(f"❌ خطأ في تحميل الملف: {e}")
-
-def next_product():
-    """Move to the next product"""
-    if st.session_state.products:
-        st.session_state.current_product = (st.session_state.current_product + 1) % len(st.session_state.products)
-
-def prev_product():
-    """Move to the previous product"""
-    if st.session_state.products:
-        st.session_state.current_product = (st.session_state.current_product - 1) % len(st.session_state.products)
+from gallery import init_session_state, load_file, reset_products, sample_download_button, show_catalog
+from timing import show_timing_panel
+
+LABELS = {
+    "missing_columns": "❌ خطأ: الأعمدة المفقودة: {columns}",
+    "empty": "⚠️ الملف فارغ أو لا يحتوي على منتجات.",
+    "load_error": "❌ خطأ في تحميل الملف: {error}",
+    "skipped_sheets": "⚠️ تم تخطي الأوراق التي لا تحتوي على الأعمدة المطلوبة: {sheets}",
+    "bundle_opened": "📦 حزمة تم إنشاؤها في {compiled_at}: {rows} منتج، {broken} صورة معطلة",
+    "no_image": "⚠️ لا يوجد رابط صورة صالح. سيتم عرض صورة افتراضية.",
+    "prev": "◀ السابق",
+    "next": "التالي ▶",
+    "prev_help": "المنتج السابق",
+    "next_help": "المنتج التالي",
+    "counter": "🛍️ المنتج {position} من {total}",
+    "loading": " (جارٍ التحميل…)",
+    "view": "طريقة العرض",
+    "views": {"detail": "🛍️ منتج", "grid": "🔲 شبكة"},
+    "search": "🔍 بحث بالاسم أو التفاصيل",
+    "no_matches": "لا توجد منتجات مطابقة.",
+    "matches": "{count} منتج مطابق",
+    "filters": "🏷️ التصفية",
+    "filter_matches": "{count} منتج يطابق التصفية",
+    "export": "⬇️ تصدير",
+    "export_format": "الصيغة",
+    "export_download": "تنزيل {count} منتج",
+    "grid": {"open": "عرض", "prev": "◀ السابق", "next": "التالي ▶", "page": "صفحة {page} من {pages}"},
+    "no_products": "📌 لا يوجد منتجات لعرضها. يرجى تحميل ملف Excel أو CSV.",
+}
+SAMPLE_ROWS = (
+    ("name", "image", "details"),
+    ("Product A", "https://images.pexels.com/photos/19254458/pexels-photo-19254458/free-photo-of-elegant-couple-walking-on-the-pavement-in-city.jpeg", "Details about Product A"),
+    ("Product B", "https://images.pexels.com/photos/19986440/pexels-photo-19986440/free-photo-of-sweet-cake-with-heart-and-letter.jpeg", "Details about Product B"),
+    ("Product C", "https://images.unsplash.com/photo-1576566588028-4147f3842f27", "Details about Product C"),
+)
 
-def reset_products():
-    """Reset uploaded products"""
-    st.session_state.products = []
-    st.session_state.current_product = 0
-    st.session_state.file_uploaded = False  
-    st.rerun()
+# Initialize session state
+init_session_state()
 
 # --- Global CSS for Cairo Font ---
 st.markdown("""
@@ -89,72 +68,14 @@ st.markdown("<h1 style='text-align: center; color: #BB9167;'>📦 معرض ال
 
 # File uploader
 if not st.session_state.file_uploaded:
-    uploaded_file = st.file_uploader("📂 تحميل ملف Excel أو CSV", type=["xlsx", "csv"])
+    uploaded_file = st.file_uploader("📂 تحميل ملف Excel أو CSV", type=["xlsx", "csv", "gallery"])
     if uploaded_file is not None:
-        load_excel_data(uploaded_file)
+        load_file(uploaded_file, LABELS)
 
 st.button("🔄 إعادة ضبط", on_click=reset_products)
 
 # Display product information
-if st.session_state.products:
-    product = st.session_state.products[st.session_state.current_product]
-
-    st.markdown(f"<h2 style='text-align: center;'>{product['name']}</h2>", unsafe_allow_html=True)
-    st.markdown(f"<p style='text-align: center; font-size: 18px; color: #ababab;'>{product['details']}</p>", unsafe_allow_html=True)
-    
-    # Custom CSS for Vertical Centering Buttons
-    st.markdown("""
-        <style>
-        .container { 
-            display: flex; 
-            align-items: center; 
-            justify-content: center; 
-        }
-        .image-container {
-            text-align: center;
-        }
-        .nav-button {
-            display: flex; 
-            align-items: center; 
-            justify-content: center;
-            height: 100%;
-        }
-        img {
-            border-radius: 20px;
-        }
-        .stColumn {align-content: center;}  
-        .counter {
-            text-align: center;
-            font-size: 18px;
-            font-weight: bold;
-            font-family: Cairo, sans-serif;
-            margin-top: 10px;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
-    col1, col2, col3 = st.columns([1, 4, 1])
-
-    with col1:
-        if len(st.session_state.products) > 1:
-            st.button("◀ السابق", on_click=prev_product, help="المنتج السابق")
-
-    with col2:
-        image_url = product.get("image link", "")
-        if isinstance(image_url, str) and image_url.startswith("http"):
-            st.image(image_url, width=400)
-        else:
-            st.warning("⚠️ لا يوجد رابط صورة صالح. سيتم عرض صورة افتراضية.")
-            st.image("https://github.com/AlexNoor74/product-gallery/blob/main/pngwing.com.png", width=400)
-
-    with col3:
-        if len(st.session_state.products) > 1:
-            st.button("التالي ▶", on_click=next_product, help="المنتج التالي")
-
-    st.markdown(f"</br><p style='text-align: center; font-size: 18px; font-weight: bold;'>🛍️ المنتج {st.session_state.current_product + 1} من {len(st.session_state.products)}</p>", unsafe_allow_html=True)
-
-else:
-    st.info("📌 لا يوجد منتجات لعرضها. يرجى تحميل ملف Excel أو CSV.")
+show_catalog(LABELS, image_width=400)
 
 # Sidebar: Instructions (Translated)
 st.sidebar.header("📌 التعليمات")
@@ -170,20 +91,7 @@ st.sidebar.write("""
 
 # Sidebar: Sample Excel Download
 st.sidebar.header("📄 Sample Excel Format")
-sample_data = pd.DataFrame({
-    "name": ["Product A", "Product B", "Product C"],
-    "image": ["https://images.pexels.com/photos/19254458/pexels-photo-19254458/free-photo-of-elegant-couple-walking-on-the-pavement-in-city.jpeg", 
-              "https://images.pexels.com/photos/19986440/pexels-photo-19986440/free-photo-of-sweet-cake-with-heart-and-letter.jpeg",
-              "https://images.unsplash.com/photo-1576566588028-4147f3842f27"],
-    "details": ["Details about Product A", "Details about Product B", "Details about Product C"]
-})
+sample_download_button(SAMPLE_ROWS, "📥 Download Sample Excel")
 
-buffer = io.BytesIO()
-with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-    sample_data.to_excel(writer, index=False, sheet_name="Sheet1")
-st.sidebar.download_button(
-    label="📥 Download Sample Excel",
-    data=buffer,
-    file_name="sample_product_data.xlsx",
-    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-)
+# Sidebar: Timings (only with GALLERY_ADMIN_PANEL set)
+show_timing_panel(st.session_state.products)
@@ -1,72 +1,49 @@
 import streamlit as st
-import pandas as pd
-import io
 
-# Initialize session state
-if "products" not in st.session_state:
-    st.session_state.products = []
-    st.session_state.current_product = 0
-    st.session_state.file_uploaded = False  
-    st.session_state.data_source = "Google Sheet"  # default option
-
-def load_excel_data(file):
-    """Load Excel or CSV data and store it in session state."""
-    try:
-        # Detect file format
-        if file.name.endswith(".csv"):
-            df = pd.read_csv(file)
-        else:
-            df = pd.read_excel(file)
-        process_dataframe(df)
-    except Exception as e:
-        st.error(f"Error loading file: {e}", icon="❌")
-
-def load_google_sheet_data(sheet_id, sheet_name):
-    """Load data from a Google Sheet using its sheet id and tab name."""
-    try:
-        url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet={sheet_name}"
-        df = pd.read_csv(url)
-        process_dataframe(df)
-    except Exception as e:
-        st.error(f"Error loading Google Sheet: {e}", icon="❌")
-
-def process_dataframe(df):
-    """Process the dataframe by standardizing columns and updating session state."""
-    # Rename column "image" to "image link" if needed.
-    df.rename(columns={"image": "image link"}, inplace=True)
-
-    required_columns = {"name", "image link", "details", "price"}
-    missing_columns = required_columns - set(df.columns)
-    if missing_columns:
-        st.error(f"Error: Missing columns: {', '.join(missing_columns)}", icon="❌")
-        return
-
-    products = df.to_dict("records")
-    if not products:
-        st.error("The file is empty or contains no products.", icon="⚠️")
-        return
-
-    st.session_state.products = products
-    st.session_state.current_product = 0  
-    st.session_state.file_uploaded = True  
-    st.rerun()
-
-def next_product():
-    """Move to the next product."""
-    if st.session_state.products:
-        st.session_state.current_product = (st.session_state.current_product + 1) % len(st.session_state.products)
-
-def prev_product():
-    """Move to the previous product."""
-    if st.session_state.products:
-        st.session_state.current_product = (st.session_state.current_product - 1) % len(st.session_state.products)
+from gallery import (
+    REQUIRED_COLUMNS, init_session_state, load_file, load_google_sheet, refresh_google_sheet, reset_products,
+    show_catalog
+)
+from timing import show_timing_panel
+
+LABELS = {
+    "missing_columns": "❌ Error: Missing columns: {columns}",
+    "empty": "⚠️ The file is empty or contains no products.",
+    "load_error": "❌ Error loading file: {error}",
+    "sheet_error": "❌ Error loading Google Sheet: {error}",
+    "skipped_sheets": "⚠️ Skipped sheets without the required columns: {sheets}",
+    "bundle_opened": "📦 Bundle compiled {compiled_at}: {rows} products, {broken} broken images",
+    "refreshed": "🔃 Google Sheet updated: {inserted} new, {updated} changed, {deleted} removed",
+    "refresh_unchanged": "🔃 The Google Sheet has not changed.",
+    "prev": "◀ السابق",
+    "next": " التالي ▶ ",
+    "prev_help": "المنتج السابق",
+    "next_help": "المنتج التالي",
+    "counter": "🛍️ المنتج {position} من {total}",
+    "loading": " (جارٍ التحميل…)",
+    "view": "طريقة العرض",
+    "views": {"detail": "🛍️ منتج", "grid": "🔲 شبكة"},
+    "search": "🔍 بحث بالاسم أو التفاصيل",
+    "no_matches": "لا توجد منتجات مطابقة.",
+    "matches": "{count} منتج مطابق",
+    "filters": "🏷️ التصفية",
+    "filter_matches": "{count} منتج يطابق التصفية",
+    "export": "⬇️ تصدير",
+    "export_format": "الصيغة",
+    "export_download": "تنزيل {count} منتج",
+    "grid": {"open": "عرض", "prev": "◀ السابق", "next": "التالي ▶", "page": "صفحة {page} من {pages}"},
+    "price": "💰 السعر",
+    "price_unparsed": "⚠️ تعذر قراءة {count} من الأسعار",
+    "price_range": "نطاق السعر",
+    "price_sort": "الترتيب",
+    "price_sorts": {"none": "بدون ترتيب", "asc": "السعر: من الأقل", "desc": "السعر: من الأعلى"},
+    "no_price_matches": "لا توجد منتجات في نطاق السعر المحدد.",
+    "no_products": "📌 No products to display. Please load an Excel/CSV file or a Google Sheet.",
+}
+PRODUCT_COLUMNS = (*REQUIRED_COLUMNS, "price")
 
-def reset_products():
-    """Reset uploaded products."""
-    st.session_state.products = []
-    st.session_state.current_product = 0
-    st.session_state.file_uploaded = False
-    st.rerun()
+# Initialize session state
+init_session_state(data_source="Google Sheet")  # default option
 
 # --- Global CSS for Cairo Font ---
 st.markdown("""
@@ -88,6 +65,7 @@ st.markdown("""
     .stMarkdown {
         font-family: 'Cairo', sans-serif;
     }
+    .st-emotion-cache-0 {place-self: center;}
     .stRadio {
         place-items: center;
         font-size: 20px;
@@ -119,79 +97,26 @@ if not st.session_state.file_uploaded:
     st.session_state.data_source = data_source
 
     if data_source == "Offline File [CSV, Excel]":
-        uploaded_file = st.file_uploader("📂 تحميل ملف Excel أو CSV", type=["xlsx", "csv"])
+        uploaded_file = st.file_uploader("📂 تحميل ملف Excel أو CSV", type=["xlsx", "csv", "gallery"])
         if uploaded_file is not None:
-            load_excel_data(uploaded_file)
+            load_file(uploaded_file, LABELS, PRODUCT_COLUMNS, prices=True)
 
     else:
         # st.toast("🔒 Make sure the Google Sheet is publicly accessible.", icon="🔒")
         # st.info("Provide your Google Sheet information:")
         sheet_id = st.text_input("Sheet ID", value="1qHVPWgCJrnC91TKQ_p4yruru53kUQrxSsaGrWfieaa4").replace(" ", "%20")
-        sheet_name = st.text_input("Sheet Name", value="Sheet1").replace(" ", "%20")
+        sheet_names = st.text_input("Sheet Name", value="Sheet1", help="Separate several tabs with commas to load them together")
         if st.button("Load Google Sheet Data", type='primary'):
-            load_google_sheet_data(sheet_id, sheet_name)
-
-# --- Display product information ---
-if st.session_state.products:
-    product = st.session_state.products[st.session_state.current_product]
-
-    st.markdown(f"<h2 style='text-align: center;'>{product['name']}</h2>", unsafe_allow_html=True)
-    st.markdown(f"<p style='text-align: center; font-size: 18px; color: #ababab;'>{product['details']}</p>", unsafe_allow_html=True)
-    st.markdown(f"<p style='text-align: center; font-size: 14px; color: #ababab;'>{product['price']}</p>", unsafe_allow_html=True)    
-    
-    st.markdown("""
-        <style>
-        .container { 
-            display: flex; 
-            align-items: center; 
-            justify-content: center; 
-        }
-        .image-container {
-            text-align: center;
-        }
-        .nav-button {
-            display: flex; 
-            align-items: center; 
-            justify-content: center;
-            height: 100%;
-        }
-        img {
-            border-radius: 20px;
-        }
-        .stColumn {align-content: center;}  
-        .counter {
-            text-align: center;
-            font-size: 18px;
-            font-weight: bold;
-            font-family: 'Cairo', sans-serif;
-            margin-top: 10px;
-        }
-            .st-emotion-cache-0 {place-self: center;}
-        </style>
-    """, unsafe_allow_html=True)
-    
-    col1, col2, col3 = st.columns([1, 4, 1])
-
-    with col1:
-        if len(st.session_state.products) > 1:
-            st.button("◀ السابق", on_click=prev_product, help="المنتج السابق")
+            sheet_names = [name.strip() for name in sheet_names.split(",") if name.strip()]
+            load_google_sheet(sheet_id, sheet_names, LABELS, PRODUCT_COLUMNS, prices=True)
 
-    with col2:
-        image_url = product.get("image link", "")
-        if isinstance(image_url, str) and image_url.startswith("http"):
-            st.image(image_url, width=500)
-        else:
-            # st.warning("No valid image URL found. Displaying a placeholder image.", icon="⚠️")
-            st.image("https://github.com/super-data74/product-gallery/blob/main/Not_Available.png?raw=true")
+elif st.session_state.sheet_source is not None:
+    # Pick up edits to the sheet without losing the current product
+    if st.button("🔃 Refresh Google Sheet"):
+        refresh_google_sheet(LABELS)
 
-    with col3:
-        if len(st.session_state.products) > 1:
-            st.button(" التالي ▶ ", on_click=next_product, help="المنتج التالي")
-
-    st.markdown(f"</br><p style='text-align: center; font-size: 18px; font-weight: bold;'>🛍️ المنتج {st.session_state.current_product + 1} من {len(st.session_state.products)}</p>", unsafe_allow_html=True)
-
-else:
-    st.info("No products to display. Please load an Excel/CSV file or a Google Sheet.", icon="📌")
+# --- Display product information ---
+show_catalog(LABELS, image_width=500, prices=True)
 
 # --- Sidebar: Instructions (Translated) ---
 # st.sidebar.header("📌 التعليمات")
@@ -229,3 +154,6 @@ else:
 #     file_name="sample_product_data.xlsx",
 #     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 # )
+
+# Sidebar: Timings (only with GALLERY_ADMIN_PANEL set)
+show_timing_panel(st.session_state.products)
@@ -0,0 +1,366 @@
+"""Offline benchmarks for loading and browsing catalogs in the gallery apps.
+
+Each case generates a synthetic catalog (CSV or XLSX, with Arabic names,
+long details and mixed price formats), uploads it through Streamlit's
+headless ``AppTest`` harness and records:
+
+* ``first_render_s``: upload rerun until the first product is shown
+* ``loaded_s``: upload until the background load has finished
+* ``validation_s``: rerun for a file that is missing a required column
+* ``nav_p50_ms`` / ``nav_p95_ms``: Next-button reruns
+* ``peak_rss_mb`` / ``baseline_rss_mb``: process memory at the end / before the upload
+* ``children_rss_mb``: memory of its child processes (the workbook parse pool) at the end
+* ``catalog_mb``: Arrow bytes held by the loaded catalog
+
+The ``coldstart`` command instead measures each app's first run in a fresh
+process (``first_run_s``, ``rss_mb``, ``children_rss_mb`` and which heavy
+modules got imported).
+
+Every case runs in its own process so peak memory is per case. Nothing
+touches the network: image links point at a closed local port, and the
+link check is off unless ``GALLERY_LINK_CHECK_WORKERS`` is set.
+
+    python benchmarks/bench_gallery.py --rows 1000 100000 --output before.json
+    python benchmarks/bench_gallery.py coldstart --output cold.json
+    python benchmarks/bench_gallery.py compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(tempfile.gettempdir(), "product-gallery-bench")
+APPS = ("app.py", "app-ar.py", "appV2.py")
+FORMATS = ("csv", "xlsx")
+ROWS = (1_000, 10_000, 100_000, 1_000_000)
+NAV_CLICKS = 20
+LOAD_TIMEOUT = 1800  # seconds for the background load of the largest catalogs
+MIME_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+METRICS = (
+    "first_render_s", "loaded_s", "validation_s", "nav_p50_ms", "nav_p95_ms", "peak_rss_mb", "children_rss_mb",
+    "catalog_mb", "first_run_s", "rss_mb",
+)
+COLD_START_REPEAT = 5
+HEAVY_MODULES = ("pandas", "openpyxl", "pyarrow", "numpy", "PIL", "requests")
+
+ARABIC_WORDS = ["قميص", "فستان", "حذاء", "حقيبة", "ساعة", "عطر", "نظارة", "وشاح", "قطن", "جلد", "أزرق", "أحمر", "ذهبي"]
+ENGLISH_WORDS = ["shirt", "dress", "shoe", "bag", "watch", "perfume", "glasses", "scarf", "cotton", "leather", "blue"]
+ARABIC_DIGITS = str.maketrans("0123456789", "٠١٢٣٤٥٦٧٨٩")
+
+
+def generate_rows(rows, seed=0, drop_column=None, image_url="http://127.0.0.1:9/images/{i}.jpg"):
+    """Yield the header and ``rows`` synthetic product rows.
+
+    ``image_url`` is formatted with the row number; by default it points at
+    a closed local port.
+    """
+    rng = random.Random(seed)
+    columns = ["name", "image", "details", "price"]
+    if drop_column:
+        columns.remove(drop_column)
+    yield columns
+    for i in range(rows):
+        words = rng.sample(ARABIC_WORDS, 2) + rng.sample(ENGLISH_WORDS, 1)
+        amount = rng.randint(5, 25_000)
+        price = rng.choice([f"{amount} SAR", f"SAR {amount:,}", f"{amount}".translate(ARABIC_DIGITS) + " ر.س", str(amount)])
+        row = {
+            "name": f"{' '.join(words)} {i}",
+            "image": image_url.format(i=i),
+            "details": " ".join(rng.choices(ARABIC_WORDS + ENGLISH_WORDS, k=60)),
+            "price": price,
+        }
+        yield [row[column] for column in columns]
+
+
+def catalog_file(rows, fmt, drop_column=None):
+    """Path of the generated catalog, written once and reused across runs."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    suffix = f"-no-{drop_column}" if drop_column else ""
+    path = os.path.join(DATA_DIR, f"catalog-{rows}{suffix}.{fmt}")
+    if os.path.exists(path):
+        return path
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if fmt == "csv":
+        import csv
+
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(generate_rows(rows, drop_column=drop_column))
+    else:
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Sheet1")
+        for row in generate_rows(rows, drop_column=drop_column):
+            sheet.append(row)
+        workbook.save(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def rss_mb():
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def children_rss_mb():
+    """Resident set size of this process's live child processes (parse workers and their manager), in MB."""
+    import multiprocessing
+
+    pids = [str(child.pid) for child in multiprocessing.active_children()]
+    if not pids:
+        return 0.0
+    ps = subprocess.run(["ps", "-o", "rss=", "-p", ",".join(pids)], capture_output=True, text=True)
+    return sum(int(rss) for rss in ps.stdout.split()) / 1024
+
+
+def _new_app_test(app):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(REPO_ROOT, app), default_timeout=LOAD_TIMEOUT)
+    at.run()
+    if app == "appV2.py":
+        at.radio[0].set_value("Offline File [CSV, Excel]").run()
+    return at
+
+
+def _upload(at, path, fmt):
+    with open(path, "rb") as f:
+        content = f.read()
+    at.file_uploader[0].set_value((os.path.basename(path), content, MIME_TYPES[fmt]))
+    start = time.perf_counter()
+    at.run()
+    return time.perf_counter() - start
+
+
+def run_case(app, fmt, rows):
+    """Benchmark one app/format/size combination in this process."""
+    sys.path.insert(0, REPO_ROOT)
+    path = catalog_file(rows, fmt)
+    invalid_path = catalog_file(min(rows, 1_000), fmt, drop_column="details")
+
+    at = _new_app_test(app)
+    baseline = rss_mb()
+    upload_started = time.perf_counter()
+    first_render = _upload(at, path, fmt)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    products = at.session_state.products
+    if not products:
+        raise RuntimeError(f"{app} did not load {path}: {[e.value for e in at.error]}")
+    while not products.complete and time.perf_counter() - upload_started < LOAD_TIMEOUT:
+        time.sleep(0.05)
+    loaded = time.perf_counter() - upload_started
+    if products.error:
+        raise RuntimeError(f"{app} failed loading {path}: {products.error}")
+    at.run()  # Render the complete catalog before navigating
+
+    navigation = []
+    for _ in range(NAV_CLICKS):
+        next_button = next(button for button in at.button if button.label.strip().endswith("▶"))
+        start = time.perf_counter()
+        next_button.click().run()
+        navigation.append((time.perf_counter() - start) * 1000)
+
+    # Validation: a file without the details column is rejected on upload
+    invalid = _new_app_test(app)
+    validation = _upload(invalid, invalid_path, fmt)
+    if not invalid.error:
+        raise RuntimeError(f"{app} accepted {invalid_path} without a details column")
+
+    return {
+        "app": app,
+        "format": fmt,
+        "rows": rows,
+        "first_render_s": round(first_render, 4),
+        "loaded_s": round(loaded, 4),
+        "validation_s": round(validation, 4),
+        "nav_p50_ms": round(float(np.percentile(navigation, 50)), 2),
+        "nav_p95_ms": round(float(np.percentile(navigation, 95)), 2),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(rss_mb(), 1),
+        "children_rss_mb": round(children_rss_mb(), 1),
+        "catalog_mb": round(getattr(products, "nbytes", 0) / (1024 * 1024), 2),
+        "loaded_rows": len(products),
+    }
+
+
+def run_cold_start(app):
+    """Time an app's first run in this (fresh) process, before any upload."""
+    from streamlit.testing.v1 import AppTest
+
+    sys.path.insert(0, REPO_ROOT)
+    start = time.perf_counter()
+    at = AppTest.from_file(os.path.join(REPO_ROOT, app), default_timeout=LOAD_TIMEOUT)
+    at.run()
+    first_run = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    for thread in threading.enumerate():
+        if thread.name == "parse-pool-warmup":
+            thread.join(LOAD_TIMEOUT)  # Count the workers it starts
+    return {
+        "app": app,
+        "format": "cold-start",
+        "rows": 0,
+        "first_run_s": round(first_run, 4),
+        "rss_mb": round(rss_mb(), 1),
+        "children_rss_mb": round(children_rss_mb(), 1),
+        "heavy_modules": [module for module in HEAVY_MODULES if module in sys.modules],
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _case_env():
+    env = dict(os.environ)
+    env.setdefault("GALLERY_IMAGE_CACHE_DIR", os.path.join(DATA_DIR, "images"))
+    env.setdefault("GALLERY_TIMING_LOG", "")
+    # The link check would probe every generated link in the background while the case is timed
+    env.setdefault("GALLERY_LINK_CHECK_WORKERS", "0")
+    return env
+
+
+def _run_child(*args):
+    """Run ``args`` as a subcommand of this script in a fresh process; returns its JSON result."""
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *args], capture_output=True, text=True, env=_case_env(),
+    )
+    if process.returncode:
+        raise RuntimeError((process.stderr.strip().splitlines()[-1:] or ["failed"])[0])
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def _report(results):
+    return {
+        "commit": _git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def run_all(apps, formats, rows_list):
+    results = []
+    for rows in rows_list:
+        for fmt in formats:
+            catalog_file(rows, fmt)  # Generate outside of the timed processes
+            for app in apps:
+                if app == "app.py" and fmt != "xlsx":
+                    continue  # app.py only accepts Excel uploads
+                print(f"{app} {fmt} {rows:,} rows ...", end=" ", flush=True)
+                try:
+                    result = _run_child("case", app, fmt, str(rows))
+                except RuntimeError as e:
+                    print(e)
+                    results.append({"app": app, "format": fmt, "rows": rows, "error": str(e)})
+                    continue
+                print(f"first render {result['first_render_s']:.2f}s, loaded {result['loaded_s']:.2f}s, "
+                      f"next p50 {result['nav_p50_ms']:.0f} ms, peak {result['peak_rss_mb']:.0f} MB "
+                      f"+ {result['children_rss_mb']:.0f} MB in child processes")
+                results.append(result)
+    return _report(results)
+
+
+def run_cold_starts(apps, repeat=COLD_START_REPEAT):
+    """Median first run and memory of each app over ``repeat`` fresh processes."""
+    results = []
+    for app in apps:
+        runs = [_run_child("coldstart-case", app) for _ in range(repeat)]
+        result = dict(runs[0])
+        result["first_run_s"] = round(float(np.median([run["first_run_s"] for run in runs])), 4)
+        result["rss_mb"] = round(float(np.median([run["rss_mb"] for run in runs])), 1)
+        result["children_rss_mb"] = round(float(np.median([run["children_rss_mb"] for run in runs])), 1)
+        print(f"{app}: first run {result['first_run_s']:.3f}s, {result['rss_mb']:.0f} MB "
+              f"+ {result['children_rss_mb']:.0f} MB in child processes, "
+              f"imports {', '.join(result['heavy_modules']) or 'none'}")
+        results.append(result)
+    return _report(results)
+
+
+def compare(before_path, after_path):
+    """Print each metric of two result files side by side with the ratio."""
+    with open(before_path, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(after_path, encoding="utf-8") as f:
+        after = json.load(f)
+    key = lambda result: (result["app"], result["format"], result["rows"])
+    old = {key(result): result for result in before["results"] if "error" not in result}
+    print(f"{before['commit']} -> {after['commit']}")
+    for result in after["results"]:
+        if "error" in result or key(result) not in old:
+            continue
+        print(f"{result['app']} {result['format']}" + (f" {result['rows']:,} rows" if result["rows"] else ""))
+        for metric in METRICS:
+            if metric not in result or metric not in old[key(result)]:
+                continue
+            a, b = old[key(result)][metric], result[metric]
+            ratio = f"{b / a:.2f}x" if a else "-"
+            print(f"    {metric:<16}{a:>12}{b:>12}{ratio:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subcommands = parser.add_subparsers(dest="command")
+    run = subcommands.add_parser("run", help="run the benchmarks (default)")
+    run.add_argument("--apps", nargs="+", default=list(APPS), choices=APPS)
+    run.add_argument("--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    run.add_argument("--rows", nargs="+", type=int, default=list(ROWS))
+    run.add_argument("--output", default="bench-results.json")
+    case = subcommands.add_parser("case", help="run a single case and print its JSON result")
+    case.add_argument("app", choices=APPS)
+    case.add_argument("format", choices=FORMATS)
+    case.add_argument("rows", type=int)
+    cold = subcommands.add_parser("coldstart", help="measure each app's first run in fresh processes")
+    cold.add_argument("--apps", nargs="+", default=list(APPS), choices=APPS)
+    cold.add_argument("--repeat", type=int, default=COLD_START_REPEAT)
+    cold.add_argument("--output", default="bench-coldstart.json")
+    cold_case = subcommands.add_parser("coldstart-case", help="measure one app's first run and print its JSON result")
+    cold_case.add_argument("app", choices=APPS)
+    diff = subcommands.add_parser("compare", help="compare two result files")
+    diff.add_argument("before")
+    diff.add_argument("after")
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in ("run", "case", "coldstart", "coldstart-case", "compare", "-h", "--help"):
+        argv = ["run", *argv]
+    args = parser.parse_args(argv)
+
+    if args.command == "case":
+        print(json.dumps(run_case(args.app, args.format, args.rows)))
+    elif args.command == "coldstart-case":
+        print(json.dumps(run_cold_start(args.app)))
+    elif args.command == "compare":
+        compare(args.before, args.after)
+    else:
+        if args.command == "coldstart":
+            report = run_cold_starts(args.apps, args.repeat)
+        else:
+            report = run_all(args.apps, args.formats, args.rows)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
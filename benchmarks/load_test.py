@@ -0,0 +1,473 @@
+"""Multi-session load test: how many concurrent users one gallery server handles.
+
+Starts an app with ``streamlit run`` together with local HTTP stand-ins for
+the Google Sheets gviz CSV endpoint and an image host, then drives N
+simulated browser sessions over Streamlit's websocket protocol. Each
+session loops through:
+
+* load: upload a CSV (even sessions) or load a Google Sheet (odd sessions)
+* ``--clicks`` Next and as many Prev clicks (fragment reruns)
+* Reset
+
+For every N in ``--sessions`` a fresh server runs for ``--duration``
+seconds and the test records:
+
+* ``rerun_p50_ms`` / ``rerun_p99_ms``: every rerun, from the click to the
+  script finishing
+* ``nav_p50_ms`` / ``nav_p99_ms``, ``load_p50_ms`` / ``load_p99_ms``,
+  ``reset_p50_ms``: the same per action
+* ``reruns_per_s``: reruns finished by all sessions per second
+* ``server_rss_mb``: resident memory of the server and its worker processes
+  at the end of the run (Linux only)
+
+Sessions share ``--catalogs`` distinct catalogs, so 1 means everyone browses
+the same one. Nothing touches the network.
+
+    python benchmarks/load_test.py --sessions 1 4 16 64 --output load.json
+    python benchmarks/load_test.py --app app-ar.py --sessions 8 --image-delay 200
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.Common_pb2 import FileUploaderState, UploadedFileInfo
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from bench_gallery import REPO_ROOT, _report, generate_rows
+
+APPS = ("appV2.py", "app-ar.py")  # app.py only accepts Excel uploads
+SESSIONS = (1, 2, 4, 8, 16, 32)
+DURATION = 30  # seconds per stage
+CLICKS = 10
+ROWS = 2_000
+CATALOGS = 4
+STARTUP_TIMEOUT = 60
+RERUN_TIMEOUT = 120
+SHEET_NAME = "Sheet1"
+FILE_SOURCE = "Offline File [CSV, Excel]"  # appV2's data source options
+SHEET_SOURCE = "Google Sheet"
+
+
+# --- Stand-ins for Google Sheets and the image host ---
+
+class StandIns:
+    """Local HTTP server answering gviz CSV exports and image requests.
+
+    ``/gviz/<sheet id>?sheet=<name>`` returns the catalog generated for the
+    sheet id and ``/images/<n>.jpg`` a JPEG, after ``image_delay`` seconds.
+    """
+
+    def __init__(self, rows=ROWS, image_delay=0):
+        self.rows = rows
+        self.image_delay = image_delay
+        self.requests = {"gviz": 0, "images": 0}
+        self._catalogs = {}
+        self._lock = threading.Lock()
+        self._image = _jpeg()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, name="stand-ins", daemon=True).start()
+
+    def catalog(self, seed):
+        """CSV bytes of catalog ``seed``, with image links served by this stand-in."""
+        with self._lock:
+            if seed not in self._catalogs:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(
+                    generate_rows(self.rows, seed=seed, image_url=f"{self.url}/images/{seed}-{{i}}.jpg")
+                )
+                self._catalogs[seed] = buffer.getvalue().encode("utf-8")
+            return self._catalogs[seed]
+
+    def _handler(self):
+        stand_ins = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                # The gallery's link check; answered like an image host would, without a body
+                if urlsplit(self.path).path.startswith("/images/"):
+                    self._send(stand_ins._image, "image/jpeg", body=False)
+                else:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+
+            def do_GET(self):
+                path = urlsplit(self.path)
+                if path.path.startswith("/images/"):
+                    stand_ins.requests["images"] += 1
+                    time.sleep(stand_ins.image_delay)
+                    self._send(stand_ins._image, "image/jpeg")
+                elif path.path.startswith("/gviz/") and parse_qs(path.query).get("sheet") == [SHEET_NAME]:
+                    stand_ins.requests["gviz"] += 1
+                    self._send(stand_ins.catalog(int(path.path.rsplit("-", 1)[-1])), "text/csv")
+                else:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+
+            def _send(self, content, content_type, body=True):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(content)
+
+        return Handler
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _jpeg(width=1200, height=900):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (187, 145, 103)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+# --- The server under test ---
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Server:
+    """``streamlit run <app>`` in a child process, with its caches in a temporary directory."""
+
+    def __init__(self, app, stand_ins):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._directory = tempfile.TemporaryDirectory(prefix="gallery-load-")
+        env = dict(os.environ)
+        env.update({
+            "GALLERY_GVIZ_URL": f"{stand_ins.url}/gviz/{{sheet_id}}?sheet={{sheet_name}}",
+            "GALLERY_IMAGE_CACHE_DIR": os.path.join(self._directory.name, "images"),
+            "GALLERY_SNAPSHOT_DIR": os.path.join(self._directory.name, "snapshots"),
+            "GALLERY_BUNDLE_DIR": os.path.join(self._directory.name, "bundles"),
+            "GALLERY_TIMING_LOG": "",
+        })
+        self._log = open(os.path.join(self._directory.name, "server.log"), "wb")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", os.path.join(REPO_ROOT, app),
+             "--server.headless", "true", "--server.address", "127.0.0.1", "--server.port", str(self.port),
+             "--server.fileWatcherType", "none", "--server.enableXsrfProtection", "false",
+             "--browser.gatherUsageStats", "false"],
+            cwd=REPO_ROOT, env=env, stdout=self._log, stderr=subprocess.STDOUT,
+        )
+        self._wait_healthy()
+
+    def _wait_healthy(self):
+        import requests
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"server exited with {self.process.returncode}: {self.log_tail()}")
+            try:
+                if requests.get(f"{self.url}/_stcore/health", timeout=1).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"server did not start within {STARTUP_TIMEOUT}s")
+
+    def rss_mb(self):
+        """Resident memory of the server and its child processes, or None off Linux."""
+        pids, total = [self.process.pid], 0
+        while pids:
+            pid = pids.pop()
+            try:
+                with open(f"/proc/{pid}/status") as f:
+                    total += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+                for task in os.listdir(f"/proc/{pid}/task"):
+                    with open(f"/proc/{pid}/task/{task}/children") as f:
+                        pids += [int(child) for child in f.read().split()]
+            except (OSError, StopIteration):
+                if pid == self.process.pid:
+                    return None
+        return total / 1024
+
+    def log_tail(self, lines=5):
+        self._log.flush()
+        with open(self._log.name, "rb") as f:
+            return " | ".join(f.read().decode(errors="replace").strip().splitlines()[-lines:])
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
+        self._directory.cleanup()
+
+
+# --- Simulated browser sessions ---
+
+class Session:
+    """One browser tab: a websocket to the server speaking Streamlit's BackMsg/ForwardMsg protocol.
+
+    Keeps the widgets of the last run (by label and by key) and the values
+    set on them, and sends them with every rerun like the frontend does.
+    Use it as a context manager to open and close the connection.
+    """
+
+    def __init__(self, server_url):
+        from websockets.sync.client import connect
+
+        self.server_url = server_url
+        self._connection = connect(f"ws{server_url[4:]}/_stcore/stream", subprotocols=["streamlit"],
+                                   max_size=None, open_timeout=STARTUP_TIMEOUT)
+        self._ws = None
+        self.session_id = None
+        self.page_script_hash = ""
+        self.widgets = {}  # id -> (kind, label, fragment id)
+        self.values = {}  # id -> WidgetState
+        self.exceptions = []
+        self._pending = []  # Messages read while waiting for something else
+
+    def __enter__(self):
+        self._ws = self._connection.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._connection.__exit__(*exc_info)
+
+    def _read(self):
+        msg = ForwardMsg()
+        msg.ParseFromString(self._ws.recv(timeout=RERUN_TIMEOUT))
+        return msg
+
+    def _receive(self):
+        return self._pending.pop(0) if self._pending else self._read()
+
+    def rerun(self, trigger=None, fragment_id=""):
+        """Rerun the script (or one fragment), optionally clicking button ``trigger``; returns seconds taken."""
+        message = BackMsg()
+        state = message.rerun_script
+        state.page_script_hash = self.page_script_hash
+        state.fragment_id = fragment_id
+        state.widget_states.widgets.extend(
+            value for widget_id, value in self.values.items() if widget_id in self.widgets
+        )
+        if trigger is not None:
+            state.widget_states.widgets.append(WidgetState(id=trigger, trigger_value=True))
+        full_run, seen = not fragment_id, set()
+        start = time.perf_counter()
+        self._ws.send(message.SerializeToString())
+        while True:
+            msg = self._receive()
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = msg.new_session.page_script_hash
+                if msg.new_session.HasField("initialize"):
+                    self.session_id = msg.new_session.initialize.session_id
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                element_kind = element.WhichOneof("type")
+                if element_kind == "exception":
+                    self.exceptions.append(element.exception.message)
+                widget = getattr(element, element_kind)
+                if getattr(widget, "id", ""):
+                    self.widgets[widget.id] = (element_kind, getattr(widget, "label", ""), msg.delta.fragment_id)
+                    seen.add(widget.id)
+            elif kind == "script_finished":
+                status = msg.script_finished
+                if status in (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY):
+                    break
+                if status == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("the app failed to compile")
+                # Finished early: the script called st.rerun(), wait for the full run it started
+                full_run, seen = True, set()
+        elapsed = time.perf_counter() - start
+        if full_run:  # Forget widgets that are gone from the page
+            self.widgets = {widget_id: widget for widget_id, widget in self.widgets.items() if widget_id in seen}
+        return elapsed
+
+    def find(self, kind, label=None, key=None):
+        """Id and fragment id of the widget of ``kind`` with a matching label or key."""
+        for widget_id, (widget_kind, widget_label, fragment_id) in self.widgets.items():
+            if widget_kind != kind:
+                continue
+            if (label is not None and label(widget_label)) or (key is not None and widget_id.endswith(f"-{key}")):
+                return widget_id, fragment_id
+        raise LookupError(f"no {kind} {key or ''} on the page")
+
+    def set_value(self, widget_id, **value):
+        self.values[widget_id] = WidgetState(id=widget_id, **value)
+
+    def click(self, **match):
+        widget_id, fragment_id = self.find("button", **match)
+        return self.rerun(trigger=widget_id, fragment_id=fragment_id)
+
+    def upload(self, name, data):
+        """Upload a file through the page's file uploader and rerun with it."""
+        import requests
+
+        start = time.perf_counter()
+        message = BackMsg()
+        message.file_urls_request.request_id = name
+        message.file_urls_request.session_id = self.session_id
+        message.file_urls_request.file_names.append(name)
+        self._ws.send(message.SerializeToString())
+        while True:
+            msg = self._read()
+            if msg.WhichOneof("type") == "file_urls_response" and msg.file_urls_response.response_id == name:
+                urls = msg.file_urls_response.file_urls[0]
+                break
+            self._pending.append(msg)
+        response = requests.put(f"{self.server_url}{urls.upload_url}", files={"file": (name, data, "text/csv")},
+                                timeout=RERUN_TIMEOUT)
+        response.raise_for_status()
+        uploader, _ = self.find("file_uploader", label=lambda label: True)
+        state = FileUploaderState()
+        state.uploaded_file_info.append(
+            UploadedFileInfo(name=name, size=len(data), file_id=urls.file_id, file_urls=urls)
+        )
+        self.set_value(uploader, file_uploader_state_value=state)
+        uploaded = time.perf_counter() - start
+        rerun = self.rerun()
+        del self.values[uploader]  # The uploader is hidden once the file is loaded
+        return uploaded + rerun
+
+
+def drive_session(number, server, stand_ins, deadline, clicks, catalogs, timings, errors):
+    """Loop one session through load, Next/Prev and Reset until ``deadline``; timings are appended per action."""
+    seed = number % catalogs
+    try:
+        with Session(server.url) as session:
+            session.rerun()
+            while time.monotonic() < deadline:
+                sources = [widget_id for widget_id, (kind, _, _) in session.widgets.items() if kind == "radio"]
+                if number % 2 == 0 or not sources:
+                    if sources:
+                        session.set_value(sources[0], string_value=FILE_SOURCE)
+                        session.rerun()
+                    timings["load"].append(session.upload(f"catalog-{seed}.csv", stand_ins.catalog(seed)))
+                else:
+                    session.set_value(sources[0], string_value=SHEET_SOURCE)
+                    sheet_id, _ = session.find("text_input", label=lambda label: label == "Sheet ID")
+                    sheet_name, _ = session.find("text_input", label=lambda label: label == "Sheet Name")
+                    session.set_value(sheet_id, string_value=f"load-test-{seed}")
+                    session.set_value(sheet_name, string_value=SHEET_NAME)
+                    timings["load"].append(session.click(label=lambda label: label.startswith("Load Google Sheet")))
+                for _ in range(clicks):
+                    timings["nav"].append(session.click(key="next_button"))
+                for _ in range(clicks):
+                    timings["nav"].append(session.click(key="prev_button"))
+                timings["reset"].append(session.click(label=lambda label: label.startswith("🔄")))
+                if session.exceptions:
+                    errors.append(f"session {number}: {session.exceptions[-1]}")
+                    session.exceptions.clear()
+    except Exception as e:
+        errors.append(f"session {number}: {type(e).__name__}: {e}")
+
+
+def _percentile(values, q):
+    return round(float(np.percentile(values, q)) * 1000, 2) if values else None
+
+
+def run_stage(app, sessions, duration, clicks, catalogs, stand_ins):
+    """Run ``sessions`` concurrent sessions against a fresh server for ``duration`` seconds."""
+    server = Server(app, stand_ins)
+    try:
+        timings = {"load": [], "nav": [], "reset": []}
+        errors = []
+        deadline = time.monotonic() + duration
+        threads = [
+            threading.Thread(target=drive_session, name=f"session-{number}",
+                             args=(number, server, stand_ins, deadline, clicks, catalogs, timings, errors))
+            for number in range(sessions)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        reruns = [t for action in timings.values() for t in action]
+        return {
+            "app": app,
+            "sessions": sessions,
+            "duration_s": round(elapsed, 2),
+            "reruns": len(reruns),
+            "reruns_per_s": round(len(reruns) / elapsed, 2),
+            "rerun_p50_ms": _percentile(reruns, 50),
+            "rerun_p99_ms": _percentile(reruns, 99),
+            "nav_p50_ms": _percentile(timings["nav"], 50),
+            "nav_p99_ms": _percentile(timings["nav"], 99),
+            "load_p50_ms": _percentile(timings["load"], 50),
+            "load_p99_ms": _percentile(timings["load"], 99),
+            "reset_p50_ms": _percentile(timings["reset"], 50),
+            "server_rss_mb": None if server.rss_mb() is None else round(server.rss_mb(), 1),
+            "errors": errors[:10],
+        }
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=APPS[0], choices=APPS)
+    parser.add_argument("--sessions", nargs="+", type=int, default=list(SESSIONS))
+    parser.add_argument("--duration", type=float, default=DURATION, help="seconds per stage")
+    parser.add_argument("--clicks", type=int, default=CLICKS, help="Next (and Prev) clicks per load")
+    parser.add_argument("--rows", type=int, default=ROWS, help="products per catalog")
+    parser.add_argument("--catalogs", type=int, default=CATALOGS, help="distinct catalogs shared by the sessions")
+    parser.add_argument("--image-delay", type=float, default=0, help="milliseconds the image host takes per image")
+    parser.add_argument("--output", default="load-results.json")
+    args = parser.parse_args(argv)
+    if args.app != "appV2.py":
+        print(f"{args.app} has no Google Sheet loader; every session uploads", file=sys.stderr)
+
+    stand_ins = StandIns(args.rows, args.image_delay / 1000)
+    results = []
+    try:
+        for sessions in args.sessions:
+            print(f"{args.app} {sessions} sessions ...", end=" ", flush=True)
+            try:
+                result = run_stage(args.app, sessions, args.duration, args.clicks, args.catalogs, stand_ins)
+            except RuntimeError as e:
+                print(e)
+                results.append({"app": args.app, "sessions": sessions, "error": str(e)})
+                continue
+            print(f"{result['reruns_per_s']:.1f} reruns/s, rerun p50 {result['rerun_p50_ms']} ms "
+                  f"p99 {result['rerun_p99_ms']} ms, next/prev p50 {result['nav_p50_ms']} ms, "
+                  f"{result['server_rss_mb']} MB" + (f", {len(result['errors'])} errors" if result["errors"] else ""))
+            results.append(result)
+    finally:
+        stand_ins.close()
+    report = _report(results)
+    report["requests"] = stand_ins.requests
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Catalog bundles: a catalog validated and compiled offline together with its images.
+
+The gallery opens a bundle (uploaded like a CSV/XLSX file) without any
+remote I/O while browsing: the catalog is memory-mapped and every image is
+already resized for the grid and the product viewer.
+
+    python bundle.py products.xlsx
+    python bundle.py "https://docs.google.com/spreadsheets/d/<id>/gviz/tq?tqx=out:csv&sheet=Sheet1" -o products.gallery
+
+A bundle is a zip archive holding:
+
+* ``catalog.arrow``: the catalog after the gallery's column mapping,
+  validation and compaction, with parsed price columns when it has prices
+* ``images/<name>``: each product image at each of ``--widths``, named as
+  in the image cache
+* ``report.json``: the validation report: row count, image counts, skipped
+  sheets and one entry per problem found in a row
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from catalog import Catalog
+from concurrency import DEFAULT_MAX_PER_HOST, HostLimiter, pooled_session
+from images import THUMBNAIL_WIDTH, ImageCache, image_cache, is_image_url, resize_image
+from pricing import with_price_columns
+from validation import REQUIRED_COLUMNS, InvalidCatalog, read_catalog
+
+BUNDLE_EXTENSION = ".gallery"
+BUNDLE_DIR = os.environ.get("GALLERY_BUNDLE_DIR", os.path.join(tempfile.gettempdir(), "product-gallery-bundles"))
+CATALOG_FILE = "catalog.arrow"
+REPORT_FILE = "report.json"
+IMAGES_DIR = "images"
+DEFAULT_WIDTHS = (THUMBNAIL_WIDTH, 400, 500, 530)  # grid thumbnails and the apps' product images
+DEFAULT_WORKERS = 16
+MESSAGES = {
+    "missing_columns": "Missing columns: {columns}",
+    "empty": "The file is empty or contains no products.",
+}
+
+
+def _price_columns(table):
+    return with_price_columns(table) if "price" in table.column_names else table
+
+
+def fetch_derivatives(session, limiter, url, widths, timeout=(5, 30)):
+    """Download one image and resize it to every width; returns ``{width: bytes}``."""
+    with limiter.slot(url):
+        response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+    return {width: resize_image(response.content, width) for width in widths}
+
+
+def compile_bundle(data, file_name, output, widths=DEFAULT_WIDTHS, workers=DEFAULT_WORKERS,
+                   max_per_host=DEFAULT_MAX_PER_HOST, progress=None):
+    """Validate a CSV/XLSX file, fetch and resize its images and write a bundle to ``output``.
+
+    Raises ``InvalidCatalog`` when the file fails the gallery's validation.
+    Links that are not http(s) URLs or whose image could not be fetched are
+    reported and cleared, so the gallery shows its placeholder for them.
+    Returns the report.
+    """
+    catalog, skipped = read_catalog(data, file_name, REQUIRED_COLUMNS, transform=_price_columns)
+    links = catalog.column("image link").cast(pa.string()).to_pylist()
+    names = catalog.column("name").cast(pa.string()).to_pylist()
+    problems = [{"row": row, "column": "name", "problem": "empty"} for row, name in enumerate(names) if not name]
+    problems += [
+        {"row": row, "column": "image link", "problem": "missing" if not link else "not_http", "value": link}
+        for row, link in enumerate(links) if not is_image_url(link)
+    ]
+
+    session = pooled_session(workers)
+    limiter = HostLimiter(max_per_host, wait=None)  # Queue for busy hosts instead of giving up
+    urls = list(dict.fromkeys(link for link in links if is_image_url(link)))
+    failed = {}
+    tmp_output = f"{output}.tmp"
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bundle-images") as pool, \
+            zipfile.ZipFile(tmp_output, "w") as bundle:
+        futures = {pool.submit(fetch_derivatives, session, limiter, url, widths): url for url in urls}
+        for done, future in enumerate(as_completed(futures), 1):
+            url = futures.pop(future)
+            try:
+                derivatives = future.result()
+            except Exception as e:
+                failed[url] = str(e) or type(e).__name__
+            else:
+                for width, image in derivatives.items():
+                    bundle.writestr(f"{IMAGES_DIR}/{ImageCache.key(url, width)}", image)
+            if progress is not None:
+                progress(done, len(urls))
+
+        problems += [
+            {"row": row, "column": "image link", "problem": "download_failed", "value": link, "error": failed[link]}
+            for row, link in enumerate(links) if link in failed
+        ]
+        problems.sort(key=lambda problem: problem["row"])
+        if failed:
+            broken = pa.array([link in failed for link in links])
+            table = catalog.table
+            column = table.column_names.index("image link")
+            links_column = pc.if_else(broken, pa.scalar(None, pa.string()), table.column(column).cast(pa.string()))
+            catalog = Catalog(table.set_column(column, "image link", links_column))
+            catalog.compact()
+
+        sink = io.BytesIO()
+        with pa.ipc.new_file(sink, catalog.table.schema) as writer:
+            writer.write_table(catalog.table)
+        bundle.writestr(CATALOG_FILE, sink.getvalue(), compress_type=zipfile.ZIP_DEFLATED)
+        report = {
+            "source": file_name,
+            "compiled_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "rows": len(catalog),
+            "columns": catalog.columns,
+            "widths": list(widths),
+            "images": {"ok": len(urls) - len(failed), "failed": len(failed)},
+            "skipped_sheets": {sheet: error.message(MESSAGES) for sheet, error in skipped.items()},
+            "problems": problems,
+        }
+        bundle.writestr(REPORT_FILE, json.dumps(report, ensure_ascii=False, indent=1), compress_type=zipfile.ZIP_DEFLATED)
+    os.replace(tmp_output, output)
+    return report
+
+
+def open_bundle(data, required_columns=REQUIRED_COLUMNS):
+    """Unpack a bundle's bytes (once per content) and map its catalog.
+
+    Returns ``(catalog, report)``; the bundle's images are served through
+    the image cache from then on. Raises ``InvalidCatalog`` when the bundle
+    lacks a required column.
+    """
+    directory = os.path.join(BUNDLE_DIR, hashlib.sha256(data).hexdigest()[:32])
+    if not os.path.isdir(directory):
+        tmp_directory = f"{directory}.{threading.get_ident()}.tmp"
+        with zipfile.ZipFile(io.BytesIO(data)) as bundle:
+            bundle.extractall(tmp_directory)
+        try:
+            os.replace(tmp_directory, directory)
+        except OSError:
+            shutil.rmtree(tmp_directory, ignore_errors=True)  # Another session unpacked it first
+
+    table = pa.ipc.open_file(pa.memory_map(os.path.join(directory, CATALOG_FILE), "r")).read_all()
+    with open(os.path.join(directory, REPORT_FILE), encoding="utf-8") as f:
+        report = json.load(f)
+    missing_columns = [column for column in required_columns if column not in table.column_names]
+    if missing_columns:
+        raise InvalidCatalog("missing_columns", columns=", ".join(missing_columns))
+    if not table.num_rows:
+        raise InvalidCatalog("empty")
+    catalog = Catalog(table)
+    catalog.memory_mapped = True
+    image_cache.add_read_only(os.path.join(directory, IMAGES_DIR))
+    return catalog, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile a product catalog and its images into a gallery bundle.")
+    parser.add_argument("source", help="CSV or XLSX file, or the http(s) URL of a CSV export such as a Google Sheet's")
+    parser.add_argument("-o", "--output", help=f"bundle path (default: the source's name with {BUNDLE_EXTENSION})")
+    parser.add_argument("--widths", type=int, nargs="+", default=list(DEFAULT_WIDTHS), help="image widths to store")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel image downloads")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_MAX_PER_HOST, help="parallel downloads per host")
+    args = parser.parse_args(argv)
+
+    if args.source.startswith(("http://", "https://")):
+        import requests
+
+        response = requests.get(args.source, timeout=(5, 60))
+        response.raise_for_status()
+        data, file_name = response.content, "export.csv"
+        output = args.output or "catalog" + BUNDLE_EXTENSION
+    else:
+        with open(args.source, "rb") as f:
+            data = f.read()
+        file_name = os.path.basename(args.source)
+        output = args.output or os.path.splitext(args.source)[0] + BUNDLE_EXTENSION
+
+    def progress(done, total):
+        if done == total or done % 100 == 0:
+            print(f"images {done}/{total}", file=sys.stderr)
+
+    start = time.perf_counter()
+    try:
+        report = compile_bundle(data, file_name, output, args.widths, args.workers, args.per_host, progress)
+    except InvalidCatalog as e:
+        print(f"{args.source}: {e.message(MESSAGES)}", file=sys.stderr)
+        return 2
+    print(f"{output}: {report['rows']} products, {report['images']['ok']} images "
+          f"({report['images']['failed']} failed), {len(report['problems'])} problems "
+          f"in {time.perf_counter() - start:.1f}s")
+    for sheet, message in report["skipped_sheets"].items():
+        print(f"skipped sheet {sheet}: {message}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+import threading
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from compact import compact_table
+from timing import phase_timer
+
+SOURCE_COLUMN = "source"
+
+
+class Catalog:
+    """Product catalog stored column-wise in an Arrow table.
+
+    Behaves like the old list of product dicts for ``len()``, truth tests and
+    indexing, but a row is only turned into a dict when it is looked up.
+
+    A catalog created with ``complete=False`` is still being filled by a
+    background loader: rows are appended with ``append`` and ``finish`` is
+    called once the source is exhausted (or failed with ``error``).
+    """
+
+    def __init__(self, table, complete=True):
+        self._table = table
+        self.complete = complete
+        self.cancelled = False
+        self.error = None
+        self.memory_mapped = False  # True when the table's buffers map a snapshot file
+        self.parts = ()  # The catalogs this one was merged from, see merge_catalogs
+        self.compacted_from = None  # Bytes before compact()
+        self.expected_rows = None  # Row count the loader expects in total, when the source tells
+        self._indexes = {}
+        self._index_lock = threading.Lock()
+
+    @classmethod
+    def from_dataframe(cls, df, complete=True, transform=None):
+        """Build a catalog from a pandas dataframe.
+
+        ``transform`` can derive extra columns from the Arrow table.
+        """
+        table = dataframe_to_table(df)
+        if transform is not None:
+            table = transform(table)
+        return cls(table, complete=complete)
+
+    @property
+    def table(self):
+        return self._table
+
+    @property
+    def columns(self):
+        return self._table.column_names
+
+    @property
+    def nbytes(self):
+        """Bytes held by the underlying Arrow buffers."""
+        return self._table.nbytes
+
+    def append(self, table):
+        """Append rows, casting them to this catalog's column types when possible.
+
+        Columns that only one side has (another sheet's extra columns) are
+        filled with nulls on the other.
+        """
+        schema = self._table.schema
+        fields = [
+            schema.field(name) if schema.get_field_index(name) >= 0 else field
+            for name, field in zip(table.column_names, table.schema)
+        ]
+        try:
+            table = table.cast(pa.schema(fields, metadata=table.schema.metadata))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass
+        # Swap in the new table in one assignment so readers never see a partial one
+        self._table = pa.concat_tables([self._table, table], promote_options="permissive")
+
+    def compact(self):
+        """Swap the table for a compacted copy (see ``compact_table``); returns the bytes saved.
+
+        Called once all rows are in, before any index is built on them.
+        """
+        start = time.perf_counter()
+        before = self.nbytes
+        self._table = compact_table(self._table)
+        self.compacted_from = before
+        phase_timer.record("compact_catalog", (time.perf_counter() - start) * 1000,
+                           rows=len(self), bytes_before=before, bytes_after=self.nbytes)
+        return before - self.nbytes
+
+    def finish(self, error=None):
+        """Mark the catalog as fully loaded."""
+        self.error = error
+        self.complete = True
+
+    def cancel(self):
+        """Ask a background loader to stop appending rows."""
+        if not self.complete:
+            self.cancelled = True
+
+    def index(self, name, build):
+        """Return the named index, building it with ``build(self)`` on first use.
+
+        Indexes are only kept once the catalog is complete; while rows are
+        still streaming in, each call builds a fresh one.
+        """
+        if not self.complete:
+            return build(self)
+        with self._index_lock:
+            if name not in self._indexes:
+                self._indexes[name] = build(self)
+            return self._indexes[name]
+
+    def built_index(self, name):
+        """Return the named index if it has been built, without building it."""
+        with self._index_lock:
+            return self._indexes.get(name)
+
+    def column(self, name):
+        """Return a whole column as an Arrow chunked array."""
+        return self._table.column(name)
+
+    def __len__(self):
+        return self._table.num_rows
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("product index out of range")
+        return self._table.slice(index, 1).to_pylist()[0]
+
+    def rows(self, start, stop, columns=None):
+        """Materialize only the rows in ``[start, stop)`` as dicts."""
+        start = max(start, 0)
+        table = self._table.slice(start, max(stop - start, 0))
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pylist()
+
+    def take(self, indices, columns=None):
+        """Materialize only the rows at ``indices`` as dicts."""
+        table = self._table
+        if columns is not None:
+            table = table.select(columns)
+        return table.take(pa.array(indices, type=pa.int64())).to_pylist()
+
+    def __iter__(self):
+        for batch in self._table.to_batches():
+            yield from batch.to_pylist()
+
+
+def merge_catalogs(catalogs):
+    """Concatenate ``{source name: catalog}`` into one catalog with a ``source`` column.
+
+    Columns that only some sources have are filled with nulls elsewhere. The
+    source column is dictionary encoded, so it costs 4 bytes per row.
+    """
+    tables = []
+    for source, catalog in catalogs.items():
+        table = _decode_dictionaries(catalog.table)  # Parts may have encoded different columns
+        if SOURCE_COLUMN in table.column_names:
+            table = table.drop_columns([SOURCE_COLUMN])
+        indices = pa.array(np.zeros(table.num_rows, dtype=np.int32))
+        tables.append(table.append_column(
+            SOURCE_COLUMN, pa.DictionaryArray.from_arrays(indices, pa.array([str(source)]))
+        ))
+    # One shared dictionary, as Arrow IPC files (snapshots) require
+    merged = Catalog(pa.concat_tables(tables, promote_options="permissive").unify_dictionaries())
+    merged.compact()
+    merged.parts = tuple(catalogs.values())
+    return merged
+
+
+def _decode_dictionaries(table):
+    schema = pa.schema([
+        field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field for field in table.schema
+    ], metadata=table.schema.metadata)
+    return table.cast(schema)
+
+
+def dataframe_to_table(df):
+    """Convert a dataframe to an Arrow table, stringifying mixed-type columns."""
+    arrays = []
+    for column in df.columns:
+        series = df[column]
+        try:
+            arrays.append(pa.array(series, from_pandas=True))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Spreadsheet columns often mix numbers and text (e.g. prices)
+            arrays.append(pa.array(series.map(_to_text), type=pa.string()))
+    return pa.Table.from_arrays(arrays, names=[str(column) for column in df.columns])
+
+
+def _to_text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    return str(value)
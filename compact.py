@@ -0,0 +1,63 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+
+DICTIONARY_RATIO = 0.5  # Dictionary encode text columns with fewer distinct values than this share of rows
+MAX_STRING_BYTES = 2 ** 31 - 1  # Limit of 32-bit string offsets
+
+
+def compact_table(table):
+    """Return a copy of ``table`` holding the same rows in less memory.
+
+    - text columns where values repeat (boilerplate details, shared
+      placeholder images, currencies) are dictionary encoded
+    - other text columns use 32-bit instead of 64-bit offsets
+    - integer and float columns are downcast when no value changes
+    - header-less, empty columns (``Unnamed: 3`` from formatted but unused
+      spreadsheet columns) are dropped
+    """
+    names, columns = [], []
+    for name, column in zip(table.column_names, table.columns):
+        if name.startswith("Unnamed: ") and column.null_count == len(column):
+            continue
+        names.append(name)
+        columns.append(compact_column(column))
+    return pa.Table.from_arrays(columns, names=names, metadata=table.schema.metadata)
+
+
+def compact_column(column):
+    """Smallest lossless representation of one column."""
+    kind = column.type
+    if pa.types.is_string(kind) or pa.types.is_large_string(kind):
+        values = len(column) - column.null_count
+        if values and pc.count_distinct(column).as_py() <= values * DICTIONARY_RATIO:
+            return _dictionary_encode(column)
+        if pa.types.is_large_string(kind) and (pc.sum(pc.binary_length(column)).as_py() or 0) <= MAX_STRING_BYTES:
+            return column.cast(pa.string())
+        return column
+    if pa.types.is_integer(kind) and column.null_count < len(column):
+        low, high = pc.min_max(column).values()
+        for narrow in (pa.int8(), pa.int16(), pa.int32()):
+            if kind.bit_width > narrow.bit_width and _fits(low.as_py(), high.as_py(), narrow):
+                return column.cast(narrow)
+        return column
+    if pa.types.is_float64(kind):
+        narrow = column.cast(pa.float32())
+        if pc.all(pc.or_kleene(pc.equal(narrow.cast(pa.float64()), column), pc.is_null(column))).as_py() is not False:
+            return narrow
+    return column
+
+
+def _dictionary_encode(column):
+    encoded = pa.chunked_array(
+        [chunk.dictionary_encode() for chunk in column.chunks], pa.dictionary(pa.int32(), column.type)
+    )
+    # One dictionary for the whole column, with the narrowest indices that fit it
+    encoded = pa.Table.from_arrays([encoded], names=["column"]).unify_dictionaries().column(0)
+    size = max((len(chunk.dictionary) for chunk in encoded.chunks), default=0)
+    indices = next((kind for kind in (pa.int8(), pa.int16()) if size <= 2 ** (kind.bit_width - 1)), pa.int32())
+    return encoded.cast(pa.dictionary(indices, pa.string()))
+
+
+def _fits(low, high, kind):
+    limit = 2 ** (kind.bit_width - 1)
+    return -limit <= low and high < limit
@@ -0,0 +1,133 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_HOST_WAIT = 5  # seconds to wait for a free slot on a busy host
+DEFAULT_MAX_WORKERS = 8
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one.
+
+    The first caller for a key runs the function; callers that arrive while
+    it is in flight wait for it and get the same result (or exception).
+    Nothing is cached once the call returns.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0  # calls that were served by another caller's flight
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class HostBusy(Exception):
+    """No connection slot for a host became free in time."""
+
+
+class HostLimiter:
+    """Cap the number of concurrent requests to each host.
+
+    A slow host can then tie up at most ``max_per_host`` worker threads;
+    further requests to it give up after ``wait`` seconds with ``HostBusy``
+    instead of queueing behind it, while other hosts are unaffected.
+    Requests that must not be dropped (sheet downloads, link checks) take a
+    queued slot instead, sharing the same cap.
+    """
+
+    def __init__(self, max_per_host=DEFAULT_MAX_PER_HOST, wait=DEFAULT_HOST_WAIT):
+        self.max_per_host = max_per_host
+        self.wait = wait
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._slots[host]
+
+    @contextmanager
+    def slot(self, url, queue=False):
+        """Hold one of the url's host slots for the duration of the block.
+
+        With ``queue`` wait for a free slot however long it takes, rather
+        than giving up after ``wait`` seconds.
+        """
+        host = urlsplit(url).netloc
+        semaphore = self._semaphore(host)
+        if not semaphore.acquire(timeout=None if queue else self.wait):
+            raise HostBusy(f"too many concurrent requests to {host}")
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+def pooled_session(size):
+    """A ``requests`` session keeping up to ``size`` connections per host alive, one per thread that shares it."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def run_concurrently(fn, items, max_workers=DEFAULT_MAX_WORKERS):
+    """Call ``fn(item)`` for every item on a thread pool and wait for all of them.
+
+    Returns ``{item: result}`` in the order of ``items``. An item whose call
+    raised maps to the exception instead, so one failure doesn't lose the
+    other results.
+    """
+    items = list(dict.fromkeys(items))
+    if not items:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix="gallery-load") as pool:
+        futures = {item: pool.submit(fn, item) for item in items}
+    return {
+        item: future.exception() if future.exception() is not None else future.result()
+        for item, future in futures.items()
+    }
+
+
+host_limiter = HostLimiter(
+    int(os.environ.get("GALLERY_MAX_PER_HOST", DEFAULT_MAX_PER_HOST)),
+    float(os.environ.get("GALLERY_HOST_WAIT", DEFAULT_HOST_WAIT)),
+)
@@ -0,0 +1,138 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from catalog import SOURCE_COLUMN
+from pricing import PRICE_COLUMNS
+
+KEY_COLUMNS = ("name", SOURCE_COLUMN)  # A product's stable identity across refreshes
+NULL_HASH = np.uint64(0x9E3779B97F4A7C15)  # Stands in for a null in a numeric column
+
+
+class RowHashes:
+    """Per-row stable keys and content hashes of a catalog.
+
+    Products sharing a name (within a source) are told apart by their
+    occurrence order, so every key is unique.
+    """
+
+    def __init__(self, keys, contents):
+        self.keys = keys
+        self.contents = contents
+
+    @classmethod
+    def build(cls, catalog, key_columns=KEY_COLUMNS):
+        import pandas as pd
+
+        keys = _hash_columns(catalog, [column for column in key_columns if column in catalog.columns])
+        occurrence = pd.Series(keys).groupby(keys).cumcount().to_numpy()
+        keys = _combine(keys, pd.util.hash_array(occurrence.astype(np.uint64)))
+        # Derived columns follow from the source ones, and compaction may store them differently per load
+        source_columns = [column for column in catalog.columns if column not in PRICE_COLUMNS]
+        return cls(keys, _hash_columns(catalog, source_columns))
+
+
+def _hash_columns(catalog, columns):
+    """One 64-bit hash per row over the logical values of ``columns``.
+
+    Values are hashed as their canonical type, so a row hashes the same
+    whether compaction stored its column dictionary encoded or downcast.
+    """
+    import pandas as pd
+
+    hashes = np.zeros(len(catalog), dtype=np.uint64)
+    for column in columns:
+        values = _canonical(catalog.column(column))
+        if pa.types.is_integer(values.type) or pa.types.is_floating(values.type) or pa.types.is_boolean(values.type):
+            # Fill nulls so the column converts to the same numpy type with or without them
+            filled = values.fill_null(pa.scalar(0).cast(values.type))
+            hashed = pd.util.hash_array(filled.to_numpy(zero_copy_only=False), categorize=False)
+            hashed[pc.is_null(values).to_numpy(zero_copy_only=False)] = NULL_HASH
+        else:
+            hashed = pd.util.hash_array(values.to_numpy(zero_copy_only=False), categorize=False)
+        hashes = _combine(hashes, hashed)
+    return hashes
+
+
+def _canonical(values):
+    """``values`` as a plain column of their logical type: decoded, with int64, float64 and 32-bit strings."""
+    kind = values.type
+    if pa.types.is_dictionary(kind):
+        values = pa.chunked_array([chunk.dictionary_decode() for chunk in values.chunks], kind.value_type)
+        kind = kind.value_type
+    if pa.types.is_integer(kind):
+        return values.cast(pa.int64())
+    if pa.types.is_floating(kind):
+        return values.cast(pa.float64())
+    if pa.types.is_large_string(kind):
+        return values.cast(pa.string())
+    return values
+
+
+def _combine(hashes, other):
+    return hashes * np.uint64(1000003) ^ other  # wraps around on overflow
+
+
+def row_hashes(catalog):
+    """Return the catalog's row hashes, computing them on first use."""
+    return catalog.index("row_hashes", RowHashes.build)
+
+
+class CatalogDiff:
+    """How a refreshed catalog's rows relate to the catalog it replaces.
+
+    ``new_to_old`` maps every new row to its old row (-1 for inserts),
+    ``old_to_new`` every old row to its new row (-1 for deletes), and
+    ``changed`` marks new rows that were inserted or whose content changed.
+    """
+
+    def __init__(self, new_to_old, old_to_new, changed):
+        self.new_to_old = new_to_old
+        self.old_to_new = old_to_new
+        self.changed = changed
+
+    @property
+    def inserted(self):
+        return int(np.count_nonzero(self.new_to_old < 0))
+
+    @property
+    def updated(self):
+        return int(np.count_nonzero(self.changed & (self.new_to_old >= 0)))
+
+    @property
+    def deleted(self):
+        return int(np.count_nonzero(self.old_to_new < 0))
+
+    def unchanged_old_to_new(self):
+        """``old_to_new`` with -1 for updated rows too, i.e. the rows an index can keep."""
+        remap = self.old_to_new.copy()
+        kept = remap >= 0
+        kept[kept] = ~self.changed[remap[kept]]
+        remap[~kept] = -1
+        return remap
+
+    def follow(self, row):
+        """New position of old ``row``, or of the next surviving row when it was deleted."""
+        later = self.old_to_new[row:]
+        survivors = later[later >= 0]
+        if len(survivors):
+            return int(survivors[0])
+        return max(len(self.new_to_old) - 1, 0)
+
+
+def diff_catalogs(old, new):
+    """Match the rows of ``new`` to those of ``old`` by stable key and compare their contents."""
+    import pandas as pd
+
+    old_hashes, new_hashes = row_hashes(old), row_hashes(new)
+    old_keys = pd.Index(old_hashes.keys)
+    if old_keys.is_unique:
+        new_to_old = old_keys.get_indexer(new_hashes.keys)
+    else:
+        new_to_old = np.full(len(new), -1, dtype=np.int64)  # Hash collision: treat as a full reload
+    matched = new_to_old >= 0
+    changed = ~matched
+    changed[matched] = new_hashes.contents[matched] != old_hashes.contents[new_to_old[matched]]
+    old_to_new = np.full(len(old), -1, dtype=np.int64)
+    old_to_new[new_to_old[matched]] = np.flatnonzero(matched)
+    return CatalogDiff(new_to_old, old_to_new, changed)
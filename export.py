@@ -0,0 +1,100 @@
+"""Export a catalog (or a filtered, sorted view of it) as CSV, XLSX or Parquet.
+
+Rows are written in batches of ``BATCH_ROWS`` to a temporary file, so an
+export holds one batch of rows in memory at a time whatever the catalog's
+size, plus the finished file's bytes when they are handed to the browser.
+"""
+import os
+import tempfile
+
+import numpy as np
+import pyarrow as pa
+
+from pricing import PRICE_COLUMNS
+
+BATCH_ROWS = 50_000
+XLSX_MAX_ROWS = 1_048_575  # Excel's row limit, less the header row; larger exports continue on another sheet
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+
+def export_batches(catalog, order=None, batch_rows=BATCH_ROWS):
+    """Yield the catalog's rows (those in ``order``, in that order) as record batches of plain columns."""
+    table = catalog.table.drop_columns([column for column in PRICE_COLUMNS if column in catalog.columns])
+    count = len(catalog) if order is None else len(order)
+    if not count:
+        yield pa.RecordBatch.from_pylist([], schema=_decoded(table.slice(0, 0)).schema)
+    for start in range(0, count, batch_rows):
+        if order is None:
+            batch = table.slice(start, batch_rows)
+        else:
+            batch = table.take(pa.array(np.asarray(order[start:start + batch_rows]), type=pa.int64()))
+        yield from _decoded(batch).to_batches()
+
+
+def _decoded(table):
+    # Dictionary encoding is an in-memory detail; CSV and Excel want the values
+    columns = [
+        column.cast(column.type.value_type) if pa.types.is_dictionary(column.type) else column
+        for column in table.columns
+    ]
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+
+def write_csv(batches, path):
+    from pyarrow import csv
+
+    writer = None
+    for batch in batches:
+        if writer is None:
+            writer = csv.CSVWriter(path, batch.schema)
+        writer.write_batch(batch)
+    if writer is not None:
+        writer.close()
+
+
+def write_parquet(batches, path):
+    import pyarrow.parquet as pq
+
+    writer = None
+    for batch in batches:
+        if writer is None:
+            writer = pq.ParquetWriter(path, batch.schema, compression="zstd")
+        writer.write_batch(batch)
+    if writer is not None:
+        writer.close()
+
+
+def write_xlsx(batches, path):
+    """Write rows with openpyxl's write-only mode, which streams each sheet to disk as it goes."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows = None, 0
+    for batch in batches:
+        offset = 0
+        while sheet is None or offset < batch.num_rows:
+            if sheet is None or sheet_rows == XLSX_MAX_ROWS:
+                sheet, sheet_rows = workbook.create_sheet(f"Sheet{len(workbook.sheetnames) + 1}"), 0
+                sheet.append(batch.schema.names)
+            part = batch.slice(offset, XLSX_MAX_ROWS - sheet_rows)
+            for row in zip(*(column.to_pylist() for column in part.columns)):
+                sheet.append(row)
+            sheet_rows += part.num_rows
+            offset += part.num_rows
+    workbook.save(path)
+
+
+WRITERS = {"csv": write_csv, "xlsx": write_xlsx, "parquet": write_parquet}
+
+
+def export_catalog(catalog, fmt, order=None):
+    """The catalog's rows (those in ``order``, in that order) encoded as ``fmt``; returns the file's bytes."""
+    with tempfile.TemporaryDirectory(prefix="gallery-export-") as directory:
+        path = os.path.join(directory, "export" + EXPORT_FORMATS[fmt][1])
+        WRITERS[fmt](export_batches(catalog, order), path)
+        with open(path, "rb") as f:
+            return f.read()
@@ -0,0 +1,113 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+MAX_FACET_VALUES = 50  # columns with more distinct values are not offered as filters
+NOT_FACETS = ("name", "image link", "details", "price", "price_amount")  # always (nearly) unique per product
+
+
+class FacetIndex:
+    """Row bitmaps for every value of the catalog's low-cardinality columns.
+
+    Each value's rows are a packed bitmap (one bit per row), so a filter
+    combines selections with bitwise ORs (values of one column) and ANDs
+    (across columns), and counts matches with a popcount instead of
+    scanning the catalog.
+    """
+
+    def __init__(self, facets, row_count):
+        self.facets = facets  # {column: (values, bitmaps)}, bitmaps[i] holding the rows of values[i]
+        self.row_count = row_count
+
+    @classmethod
+    def build(cls, catalog, max_values=MAX_FACET_VALUES):
+        facets = {}
+        for column in catalog.columns:
+            if column in NOT_FACETS:
+                continue
+            facet = _facet(catalog.column(column), max_values)
+            if facet is not None:
+                facets[column] = facet
+        return cls(facets, len(catalog))
+
+    @property
+    def columns(self):
+        return list(self.facets)
+
+    def values(self, column):
+        return self.facets[column][0]
+
+    def mask(self, selections, skip=None):
+        """Packed bitmap of the rows matching ``{column: [values]}``, or None when nothing is selected.
+
+        ``skip`` leaves one column's selection out, for that column's counts.
+        """
+        mask = None
+        for column, selected in selections.items():
+            if column == skip or not selected or column not in self.facets:
+                continue
+            values, bitmaps = self.facets[column]
+            positions = [values.index(value) for value in selected if value in values]
+            column_mask = np.bitwise_or.reduce(bitmaps[positions], axis=0) if positions else np.zeros_like(bitmaps[0])
+            mask = column_mask if mask is None else mask & column_mask
+        return mask
+
+    def counts(self, column, selections):
+        """Matches of each of ``column``'s values given the selections in the other columns."""
+        values, bitmaps = self.facets[column]
+        mask = self.mask(selections, skip=column)
+        if mask is not None:
+            bitmaps = bitmaps & mask
+        return dict(zip(values, np.bitwise_count(bitmaps).sum(axis=1, dtype=np.int64).tolist()))
+
+    def count(self, selections):
+        mask = self.mask(selections)
+        return self.row_count if mask is None else int(np.bitwise_count(mask).sum(dtype=np.int64))
+
+    def rows(self, selections):
+        """Sorted row indices matching the selections, or None when nothing is selected."""
+        mask = self.mask(selections)
+        if mask is None:
+            return None
+        return np.flatnonzero(np.unpackbits(mask, count=self.row_count)).astype(np.int32)
+
+    def contains(self, selections, rows):
+        """Which of ``rows`` match the selections (all of them when nothing is selected)."""
+        mask = self.mask(selections)
+        if mask is None:
+            return np.ones(len(rows), dtype=bool)
+        return np.unpackbits(mask, count=self.row_count).astype(bool)[rows]
+
+
+def _facet(column, max_values):
+    """``(values, bitmaps)`` for a column with few distinct, repeating values, else None."""
+    kind = column.type.value_type if pa.types.is_dictionary(column.type) else column.type
+    if not (pa.types.is_string(kind) or pa.types.is_large_string(kind)
+            or pa.types.is_integer(kind) or pa.types.is_boolean(kind)):
+        return None
+    present = len(column) - column.null_count
+    if not present:
+        return None
+    if not pa.types.is_dictionary(column.type):
+        # Reject near-unique columns (SKUs, URLs) from their first rows before hashing all of them
+        if pc.count_distinct(column.slice(0, max_values * 20)).as_py() > max_values:
+            return None
+        column = pc.dictionary_encode(column)
+    # One dictionary for the whole column, as compact() leaves it
+    column = pa.Table.from_arrays([column], names=["column"]).unify_dictionaries().column(0)
+    values = column.chunk(0).dictionary.to_pylist() if column.num_chunks else []
+    if not 1 < len(values) <= max_values or len(values) * 2 > present:
+        return None
+    codes = np.concatenate([chunk.indices.fill_null(-1).to_numpy(zero_copy_only=False) for chunk in column.chunks])
+    facet = sorted(
+        (str(value), np.packbits(codes == code)) for code, value in enumerate(values) if value is not None
+    )
+    facet = [(value, bitmap) for value, bitmap in facet if np.bitwise_count(bitmap).any()]  # Unused dictionary entries
+    if len(facet) < 2:
+        return None
+    return [value for value, _ in facet], np.stack([bitmap for _, bitmap in facet])
+
+
+def facet_index(catalog):
+    """Return the catalog's facet index, building it on first use."""
+    return catalog.index("facets", FacetIndex.build)
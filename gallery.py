@@ -0,0 +1,680 @@
+"""Shared core of the gallery apps: loading, validation, navigation and views.
+
+app.py, app-ar.py and appV2.py are thin front ends that add their page
+chrome and pass their localized texts as a ``labels`` dict. pandas and
+openpyxl are only imported once a file is actually read or the sample
+workbook is downloaded, which keeps the first page load light.
+"""
+import functools
+import io
+
+import numpy as np
+import streamlit as st
+
+from bundle import BUNDLE_EXTENSION, open_bundle
+from catalog import SOURCE_COLUMN, Catalog, merge_catalogs
+from concurrency import host_limiter, run_concurrently
+from diff import diff_catalogs
+from export import EXPORT_FORMATS, export_catalog
+from facets import facet_index
+from grid import PLACEHOLDER_IMAGE, open_product, show_thumbnail_grid
+from images import image_prefetcher, image_usable, is_image_url, neighbour_image_urls
+from ingest import load_remaining, read_first_chunk, warm_parse_pool, workbook_sheet_names
+from linkcheck import link_health
+from parse_cache import parse_cache, parse_cache_key
+from pricing import price_index, with_price_columns
+from registry import CatalogHandle, catalog_registry
+from search import search_index, warm_search_index
+from sheets import sheet_fetcher
+from snapshot import sheet_snapshot_key, snapshot_store
+from timing import timed
+from validation import COLUMN_MAPPING, REQUIRED_COLUMNS, InvalidCatalog, build_catalog, read_workbook_sheets
+
+SEARCH_RESULTS_SHOWN = 20
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+warm_parse_pool()  # Only with GALLERY_WARM_PARSE_POOL; otherwise the parsers start on the first workbook upload
+
+# Custom CSS for the product viewer (centered image and navigation buttons)
+VIEWER_CSS = """
+        <style>
+        .container {
+            display: flex;
+            align-items: center;
+            justify-content: center;
+        }
+        .image-container {
+            text-align: center;
+        }
+        .nav-button {
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            height: 100%;
+        }
+        img {
+            border-radius: 20px;
+        }
+        .stColumn {align-content: center;}
+        .counter {
+            text-align: center;
+            font-size: 18px;
+            font-weight: bold;
+            font-family: 'Cairo', sans-serif;
+            margin-top: 10px;
+        }
+        </style>
+"""
+
+
+def init_session_state(**defaults):
+    """Set up a session's state on its first run, plus any front-end ``defaults``."""
+    if "products" in st.session_state:
+        return
+    catalog_registry.evict_idle()  # New sessions also sweep catalogs nobody has used for a while
+    st.session_state.products = []
+    st.session_state.current_product = 0
+    st.session_state.file_uploaded = False  # Track file upload status
+    st.session_state.view_mode = "detail"  # "detail" or "grid"
+    st.session_state.grid_page = 0
+    st.session_state.search_hits = None  # Row indices matching the search box
+    st.session_state.view_order = None  # Row indices to navigate when filtered/sorted by facets or price
+    st.session_state.view_position = 0
+    st.session_state.load_notice = None  # (level, text) from the last load, shown with the catalog
+    st.session_state.sheet_source = None  # Arguments of the last load_google_sheet, for refreshes
+    for name, value in defaults.items():
+        st.session_state[name] = value
+
+
+# --- Loading ---
+
+@timed("load_excel_data")
+def load_file(file, labels, required_columns=REQUIRED_COLUMNS, prices=False):
+    """Load an uploaded Excel, CSV or bundle file and show its first product.
+
+    With ``prices`` the ``price`` column is parsed into numeric
+    ``price_amount``/``price_currency`` columns for the price filter.
+    Bundles (see ``bundle.py``) were validated and parsed when compiled.
+    """
+    try:
+        transform = with_price_columns if prices else None
+
+        # A file another session has open (even one still loading) is shared; a
+        # repeat upload is served from the parse cache, or after a restart from
+        # its snapshot on disk
+        cache_key = parse_cache_key(file.getvalue(), COLUMN_MAPPING, file.name, variant="prices" if prices else "")
+        products = catalog_registry.get(cache_key) or parse_cache.get(cache_key)
+        if products is None:
+            snapshot = snapshot_store.open(cache_key)
+            if snapshot is not None:
+                products = snapshot[0]
+                parse_cache.put(cache_key, products)
+        if products is None and file.name.endswith(BUNDLE_EXTENSION):
+            # Nothing to parse, and the images come resized with the bundle
+            products, report = open_bundle(file.getvalue(), required_columns)
+            st.session_state.load_notice = ("info", labels["bundle_opened"].format(
+                compiled_at=report["compiled_at"], rows=report["rows"], broken=report["images"]["failed"]
+            ))
+        sheet_names = workbook_sheet_names(file) if products is None and file.name.endswith(".xlsx") else []
+        if products is None:
+            # Only the first chunk is parsed here; the rest streams in the background
+            if len(sheet_names) > 1:
+                started = start_workbook_sheets(file.getvalue(), sheet_names, labels, required_columns)
+                if started is None:
+                    return
+                first, remaining_chunks, expected_rows = started
+            else:
+                sizes = []
+                first, remaining_chunks = read_first_chunk(file, COLUMN_MAPPING, on_size=sizes.append)
+                expected_rows = sizes[0] if sizes else None
+            products = process_dataframe(first, labels, required_columns, transform, complete=False)
+            if products is None:
+                remaining_chunks.close()
+                return
+            products.expected_rows = expected_rows
+
+            def on_complete(catalog):
+                parse_cache.put(cache_key, catalog)
+                search_index(catalog)  # Build the search and facet indexes at load time
+                facet_index(catalog)
+                link_health(catalog)  # Check the image links in the background
+                snapshot_store.save(cache_key, catalog)
+
+            load_remaining(products, remaining_chunks, on_complete=on_complete, transform=transform)
+
+        st.session_state.sheet_source = None
+        show_products(products, cache_key, on_evict=functools.partial(parse_cache.discard, cache_key))
+    except InvalidCatalog as e:
+        st.error(e.message(labels))
+    except Exception as e:
+        st.error(labels["load_error"].format(error=e))
+
+
+@timed("start_workbook_sheets")
+def start_workbook_sheets(data, sheet_names, labels, required_columns=REQUIRED_COLUMNS):
+    """Start parsing every sheet of a workbook, to stream in as one catalog.
+
+    Sheets without the required columns (notes, lookups ...) are skipped
+    with a warning. Returns ``(first chunk, remaining chunks, expected
+    rows)``, or None (after showing the errors) when no sheet is usable.
+    """
+    first, chunks, expected_rows, skipped = read_workbook_sheets(data, sheet_names, required_columns)
+    if first is None:
+        for sheet_name, error in skipped.items():
+            st.error(f"{sheet_name}: {error_message(error, labels, 'load_error')}")
+        return None
+    for error in skipped.values():
+        if not isinstance(error, InvalidCatalog):
+            chunks.close()
+            raise error
+    if skipped:
+        st.session_state.load_notice = ("warning", labels["skipped_sheets"].format(sheets=", ".join(skipped)))
+    return first, chunks, expected_rows
+
+
+@timed("load_google_sheet_data")
+def load_google_sheet(sheet_id, sheet_names, labels, required_columns=REQUIRED_COLUMNS, prices=False, refresh=False):
+    """Load one or more Google Sheet tabs by sheet id and tab names and show the first product.
+
+    ``sheet_names`` is a tab name or a list of them. Tabs are fetched and
+    parsed concurrently, so several take about as long as the slowest one,
+    and are merged into one catalog whose ``source`` column names each row's
+    tab. With ``refresh`` the tabs are revalidated even if recently fetched
+    and the session stays on its current product (see ``refresh_products``).
+    """
+    if isinstance(sheet_names, str):
+        sheet_names = [sheet_names]
+    sheet_names = list(dict.fromkeys(sheet_names))
+    transform = with_price_columns if prices else None
+    variant = "prices" if prices else ""
+    parser = f"{variant}:{','.join(required_columns)}"  # The fetcher's results depend on how a tab is parsed
+
+    def load_tab(sheet_name):
+        snapshot_key = sheet_snapshot_key(sheet_id, sheet_name, variant)
+
+        def parse(content):
+            import pandas as pd
+
+            return build_catalog(pd.read_csv(io.BytesIO(content)), required_columns, transform)
+
+        def save_snapshot(catalog, etag, last_modified):
+            snapshot_store.save_in_background(snapshot_key, catalog, {"etag": etag, "last_modified": last_modified})
+
+        if not sheet_fetcher.has(sheet_id, sheet_name, parser):
+            # After a restart, revalidate the sheet's snapshot instead of starting from scratch
+            snapshot = snapshot_store.open(snapshot_key)
+            if snapshot is not None:
+                catalog, metadata = snapshot
+                sheet_fetcher.seed(
+                    sheet_id, sheet_name, catalog, metadata.get("etag"), metadata.get("last_modified"), variant=parser
+                )
+
+        # Pooled, conditional fetch; unchanged sheets come back from the cache
+        return sheet_fetcher.fetch(
+            sheet_id, sheet_name, parse=parse, on_download=save_snapshot, revalidate=refresh, variant=parser
+        )
+
+    def evict():
+        for sheet_name in sheet_names:
+            sheet_fetcher.invalidate(sheet_id, sheet_name)
+
+    try:
+        # Every tab comes from the same host, so more threads than its slots would only queue
+        tabs = run_concurrently(load_tab, sheet_names, max_workers=min(len(sheet_names), host_limiter.max_per_host))
+        failed = {name: result for name, result in tabs.items() if isinstance(result, Exception)}
+        for sheet_name, error in failed.items():
+            message = error_message(error, labels, "sheet_error")
+            st.error(f"{sheet_name}: {message}" if len(tabs) > 1 else message)
+        if failed:
+            return
+        if len(tabs) == 1:
+            products, key = tabs[sheet_names[0]], sheet_snapshot_key(sheet_id, sheet_names[0], variant)
+        else:
+            key = f"sheets:{sheet_id}:{sheet_names}:{variant}"
+            products = merged_catalog(tabs, key)
+        st.session_state.sheet_source = {
+            "sheet_id": sheet_id, "sheet_names": sheet_names, "required_columns": required_columns, "prices": prices,
+        }
+        if refresh and st.session_state.products:
+            refresh_products(products, key, labels, on_evict=evict)
+        else:
+            show_products(products, key, on_evict=evict)
+    except Exception as e:
+        st.error(labels["sheet_error"].format(error=e))
+
+
+@timed("process_dataframe")
+def process_dataframe(df, labels, required_columns=REQUIRED_COLUMNS, transform=None, complete=True):
+    """Build a catalog with ``build_catalog``.
+
+    Returns None (after showing the error) when the data is not usable.
+    """
+    try:
+        return build_catalog(df, required_columns, transform, complete)
+    except InvalidCatalog as e:
+        st.error(e.message(labels))
+        return None
+
+
+def error_message(error, labels, label):
+    """Text for a loading error: its own message for ``InvalidCatalog``, else ``labels[label]``."""
+    if isinstance(error, InvalidCatalog):
+        return error.message(labels)
+    return labels[label].format(error=error)
+
+
+def merged_catalog(parts, key=None):
+    """Merge ``{source: catalog}``, reusing the merge registered under ``key`` while none of the parts changed."""
+    registered = catalog_registry.get(key) if key is not None else None
+    if registered is not None and registered.parts == tuple(parts.values()):
+        return registered
+    with timed("merge_catalogs", parts=len(parts)):
+        return merge_catalogs(parts)
+
+
+def show_products(products, key, on_evict=None):
+    """Show the first product of a loaded catalog.
+
+    The session keeps a handle on the catalog registered under ``key`` in the
+    shared registry rather than a catalog of its own.
+    """
+    if products.complete:
+        warm_search_index(products)
+        facet_index(products)
+        link_health(products)
+    handle = catalog_registry.acquire(key, products, on_evict=on_evict)
+    release_products(st.session_state.products)
+    st.session_state.products = handle
+    st.session_state.current_product = 0  # Reset to first product
+    st.session_state.file_uploaded = True  # Auto-hide file uploader
+    st.rerun()  # 🔥 Auto-refresh UI to hide uploader immediately
+
+
+def refresh_google_sheet(labels):
+    """Pull the session's Google Sheet tabs again and apply what changed."""
+    load_google_sheet(labels=labels, refresh=True, **st.session_state.sheet_source)
+
+
+@timed("refresh_products")
+def refresh_products(products, key, labels, on_evict=None):
+    """Swap in a refreshed catalog while keeping the session on the same product.
+
+    Rows are matched to the current catalog by stable key (see ``diff.py``),
+    so the current product, search hits and price order follow the products
+    rather than their positions. A built search index is carried over,
+    tokenizing only the inserted and updated rows.
+    """
+    previous = st.session_state.products
+    if products is previous.catalog:
+        st.session_state.load_notice = ("info", labels["refresh_unchanged"])
+        st.rerun()
+    diff = diff_catalogs(previous.catalog, products)
+    index = previous.built_index("search")
+    if index is not None:
+        products.index("search", lambda catalog: index.updated(diff, catalog))
+
+    link_health(products)  # Links seen before come from the checker's cache
+    handle = catalog_registry.acquire(key, products, on_evict=on_evict)
+    release_products(previous)
+    st.session_state.products = handle
+    st.session_state.current_product = diff.follow(st.session_state.current_product)
+    if st.session_state.search_hits is not None:
+        st.session_state.search_hits = search_index(products).search(st.session_state.search_query)
+    if st.session_state.view_order is not None:
+        st.session_state.pop("price_range", None)  # The price bounds may have changed
+        st.session_state.view_order = filtered_order()
+        st.session_state.view_position = 0
+    st.session_state.load_notice = (
+        "info", labels["refreshed"].format(inserted=diff.inserted, updated=diff.updated, deleted=diff.deleted)
+    )
+    st.rerun()
+
+
+def release_products(products):
+    """Let go of the session's catalog, stopping a load nobody else is waiting for."""
+    if isinstance(products, CatalogHandle):
+        if products.release():
+            products.cancel()
+    elif isinstance(products, Catalog):
+        products.cancel()
+
+
+# --- Navigation callbacks ---
+
+def current_position():
+    """Position of the current product in the navigation order, and the order's length."""
+    order = st.session_state.view_order
+    if order is not None and len(order):
+        position = st.session_state.view_position
+        if position < len(order) and order[position] == st.session_state.current_product:
+            return position, len(order)
+    return st.session_state.current_product, len(st.session_state.products)
+
+
+def navigation_order():
+    """The order Next/Prev walk (None for the whole catalog) and the current product's position in it."""
+    order = st.session_state.view_order
+    if order is None or not len(order):
+        return None, st.session_state.current_product
+    position = st.session_state.view_position
+    if position >= len(order) or order[position] != st.session_state.current_product:
+        matches = np.flatnonzero(order == st.session_state.current_product)
+        position = int(matches[0]) if len(matches) else 0
+    return order, position
+
+
+def step_product(step):
+    """Move ``step`` products through the filtered order, or the whole catalog."""
+    order = st.session_state.view_order
+    if order is None:
+        if st.session_state.products:
+            st.session_state.current_product = (st.session_state.current_product + step) % len(st.session_state.products)
+        return
+    if not len(order):
+        return
+    position = st.session_state.view_position
+    if position >= len(order) or order[position] != st.session_state.current_product:
+        # The current product was picked from search or the grid; find it in the order
+        matches = np.flatnonzero(order == st.session_state.current_product)
+        position = matches[0] if len(matches) else (-1 if step > 0 else 0)
+    position = (position + step) % len(order)
+    st.session_state.view_position = int(position)
+    st.session_state.current_product = int(order[position])
+
+
+def next_product():
+    """Move to the next product"""
+    step_product(1)
+
+
+def prev_product():
+    """Move to the previous product"""
+    step_product(-1)
+
+
+def price_order():
+    """Row order for the price range and sort widgets, or None when neither is in use."""
+    index = price_index(st.session_state.products)
+    low, high = st.session_state.get("price_range", (index.min, index.max))
+    sort = st.session_state.price_sort
+    if sort == "none" and (low, high) == (index.min, index.max):
+        return None
+    order = index.range(low, high, descending=sort == "desc")
+    return np.sort(order) if sort == "none" else order
+
+
+def facet_selections():
+    """Values picked in the facet filters, ``{column: [values]}``."""
+    return {
+        column: st.session_state.get(f"facet_{column}", [])
+        for column in facet_index(st.session_state.products).columns
+    }
+
+
+def filtered_order():
+    """Row order for the facet filters and price widgets, or None when none is in use.
+
+    Facet selections are applied to the price order as a bitmap lookup, so
+    navigation steps through the filtered rows without rescanning the catalog.
+    """
+    order = price_order() if "price_sort" in st.session_state else None
+    index = facet_index(st.session_state.products)
+    selections = facet_selections()
+    if order is None:
+        return index.rows(selections)
+    return order[index.contains(selections, order)]
+
+
+def apply_filters():
+    """Restrict (and sort) navigation by the facet filters and the price widgets."""
+    order = filtered_order()
+    st.session_state.view_order = order
+    st.session_state.view_position = 0
+    st.session_state.grid_page = 0
+    if order is not None and len(order):
+        st.session_state.current_product = int(order[0])
+
+
+def search_products():
+    """Jump to the first product matching the search box"""
+    query = st.session_state.search_query
+    hits = search_index(st.session_state.products).search(query) if query.strip() else None
+    st.session_state.search_hits = hits
+    if hits is not None and len(hits):
+        st.session_state.current_product = int(hits[0])
+        st.session_state.view_mode = "detail"
+
+
+def reset_products():
+    """Reset uploaded products and show file uploader again"""
+    release_products(st.session_state.products)
+    st.session_state.products = []
+    st.session_state.current_product = 0
+    st.session_state.file_uploaded = False  # Show file uploader again
+    st.session_state.grid_page = 0
+    st.session_state.search_query = ""
+    st.session_state.search_hits = None
+    st.session_state.view_order = None
+    st.session_state.view_position = 0
+    st.session_state.sheet_source = None
+    st.session_state.pop("price_range", None)
+    st.session_state.pop("price_sort", None)
+    for key in [key for key in st.session_state if key.startswith("facet_")]:
+        st.session_state.pop(key)
+    st.rerun()  # 🔥 Auto-refresh UI to show uploader immediately
+
+
+# --- Views ---
+
+def show_search(labels):
+    """Search box and the list of matching products."""
+    st.text_input(labels["search"], key="search_query", on_change=search_products,
+                  disabled=not st.session_state.products.complete)
+    hits = st.session_state.search_hits
+    if hits is not None and not len(hits):
+        st.caption(labels["no_matches"])
+    elif hits is not None:
+        with st.expander(labels["matches"].format(count=len(hits))):
+            shown = hits[:SEARCH_RESULTS_SHOWN]
+            names = st.session_state.products.column("name").take(shown).to_pylist()
+            for index, name in zip(shown.tolist(), names):
+                st.button(str(name), key=f"search_hit_{index}", on_click=open_product, args=(index,))
+
+
+def show_facet_filter(labels):
+    """Multi-select filters for the catalog's low-cardinality columns, with live match counts."""
+    if not st.session_state.products.complete:
+        return
+    index = facet_index(st.session_state.products)
+    if not index.columns:
+        return
+    for column in index.columns:
+        key = f"facet_{column}"
+        if key in st.session_state:  # Drop values a refresh removed
+            st.session_state[key] = [value for value in st.session_state[key] if value in index.values(column)]
+    selections = facet_selections()
+    with st.expander(labels["filters"]):
+        for column in index.columns:
+            counts = index.counts(column, selections)
+            st.multiselect(column, options=index.values(column), key=f"facet_{column}", on_change=apply_filters,
+                           format_func=lambda value, counts=counts: f"{value} ({counts[value]})")
+        if any(selections.values()):
+            st.caption(labels["filter_matches"].format(count=index.count(selections)))
+
+
+def show_price_filter(labels):
+    """Price range slider and sort order, once the catalog is fully loaded."""
+    if not st.session_state.products.complete:
+        return
+    index = price_index(st.session_state.products)
+    with st.expander(labels["price"]):
+        if index.unparsed:
+            st.caption(labels["price_unparsed"].format(count=index.unparsed))
+        if not len(index):
+            return  # No price could be read, so there is nothing to filter or sort by
+        if index.min < index.max:
+            st.slider(labels["price_range"], min_value=index.min, max_value=index.max, value=(index.min, index.max),
+                      key="price_range", on_change=apply_filters)
+        st.selectbox(labels["price_sort"], options=["none", "asc", "desc"], key="price_sort",
+                     on_change=apply_filters, format_func=labels["price_sorts"].get)
+    if st.session_state.view_order is not None and not len(st.session_state.view_order):
+        st.caption(labels["no_price_matches"])
+
+
+@timed("render_product")
+def show_product_viewer(labels, image_width, prices=False, loading=False):
+    """Show the current product with its navigation buttons and counter
+
+    Runs as a fragment, so Next/Prev rerun only this part of the page. With
+    ``loading`` the fragment polls while rows stream in and reruns the whole
+    page once the catalog is complete.
+    """
+    if loading and st.session_state.products.complete:
+        st.rerun()
+    products = st.session_state.products
+    product = products[st.session_state.current_product]
+
+    st.markdown(
+        f"<h2 style='text-align: center; font-family: Cairo, sans-serif;'>{product['name']}</h2>",
+        unsafe_allow_html=True
+    )
+    st.markdown(
+        f"<p style='text-align: center; font-size: 18px; font-family: Cairo, sans-serif; color: #ababab;'>{product['details']}</p>",
+        unsafe_allow_html=True
+    )
+    if prices:
+        st.markdown(
+            f"<p style='text-align: center; font-size: 14px; color: #ababab;'>{product['price']}</p>",
+            unsafe_allow_html=True
+        )
+
+    if product.get(SOURCE_COLUMN):
+        # Sheet or tab the product came from, for catalogs merged from several
+        st.markdown(
+            f"<p style='text-align: center; font-size: 14px; color: #ababab;'>{product[SOURCE_COLUMN]}</p>",
+            unsafe_allow_html=True
+        )
+
+    # Centered layout: Previous button | Image | Next button
+    col1, col2, col3 = st.columns([1, 4, 1])
+
+    with col1:
+        if len(products) > 1:
+            st.button(labels["prev"], on_click=prev_product, key="prev_button", help=labels["prev_help"])
+
+    with col2:
+        image_url = product.get("image link")
+        if is_image_url(image_url) and image_usable(products, st.session_state.current_product):
+            # Serve the resized local copy when the prefetcher already has it
+            st.image(image_prefetcher.get(image_url, image_width) or image_url, width=image_width)
+        else:
+            if labels.get("no_image"):
+                st.warning(labels["no_image"])
+            st.image(PLACEHOLDER_IMAGE, width=image_width)
+        # Warm the cache for the products around this one
+        order, position = navigation_order()
+        image_prefetcher.prefetch(neighbour_image_urls(products, position, order=order), image_width)
+
+    with col3:
+        if len(products) > 1:
+            st.button(labels["next"], on_click=next_product, key="next_button", help=labels["next_help"])
+
+    # Centered Product Counter
+    position, total = current_position()
+    loading_label = "" if products.complete else labels["loading"]
+    st.markdown(
+        f"</br><p class='counter'>{labels['counter'].format(position=position + 1, total=total)}{loading_label}</p>",
+        unsafe_allow_html=True
+    )
+    if not products.complete and products.expected_rows:
+        st.progress(min(len(products) / products.expected_rows, 1.0))
+    if products.error:
+        st.error(labels["load_error"].format(error=products.error))
+
+
+@timed("export_catalog")
+def export_products(catalog, fmt, order=None):
+    """Encode the exported rows; runs when the download is requested, not on every rerun."""
+    return export_catalog(catalog, fmt, order)
+
+
+def show_export(labels):
+    """Download of the products being browsed, filtered and sorted like the navigation."""
+    products = st.session_state.products
+    if not products.complete:
+        return
+    order = st.session_state.view_order
+    count = len(products) if order is None else len(order)
+    with st.expander(labels["export"]):
+        fmt = st.radio(labels["export_format"], options=list(EXPORT_FORMATS), key="export_format", horizontal=True,
+                       format_func=str.upper)
+        mime, extension = EXPORT_FORMATS[fmt]
+        st.download_button(
+            labels["export_download"].format(count=count),
+            data=functools.partial(export_products, getattr(products, "catalog", products), fmt, order),
+            file_name="products" + extension,
+            mime=mime,
+            disabled=not count,
+        )
+
+
+def show_catalog(labels, image_width, prices=False):
+    """View switch, search, price filter and the product or grid view.
+
+    Shows ``labels["no_products"]`` while nothing is loaded.
+    """
+    products = st.session_state.products
+    if not products:
+        st.info(labels["no_products"])
+        return
+
+    if st.session_state.load_notice:
+        level, text = st.session_state.load_notice
+        getattr(st, level)(text)
+        st.session_state.load_notice = None
+
+    st.radio(labels["view"], options=["detail", "grid"], key="view_mode", horizontal=True,
+             format_func=labels["views"].get)
+    show_search(labels)
+    show_facet_filter(labels)
+    if prices:
+        show_price_filter(labels)
+    show_export(labels)
+
+    if st.session_state.view_mode == "grid":
+        show_thumbnail_grid(products, labels["grid"], order=st.session_state.view_order)
+        return
+
+    # Custom CSS for Vertical Centering Buttons
+    st.markdown(VIEWER_CSS, unsafe_allow_html=True)
+    if products.complete:
+        st.fragment(show_product_viewer)(labels, image_width, prices)
+    else:
+        st.fragment(show_product_viewer, run_every=1)(labels, image_width, prices, loading=True)
+
+
+# --- Sample workbook ---
+
+@st.cache_resource(show_spinner=False)
+@timed("sample_workbook")
+def sample_workbook(rows):
+    """Build an .xlsx of ``rows`` (header row first) once per process"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    for row in rows:
+        sheet.append(list(row))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def sample_download_button(rows, label):
+    """Sidebar download of the sample workbook, built only when it is clicked."""
+    st.sidebar.download_button(
+        label=label,
+        data=functools.partial(sample_workbook, rows),
+        file_name="sample_product_data.xlsx",
+        mime=XLSX_MIME
+    )
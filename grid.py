@@ -0,0 +1,87 @@
+import os
+
+import streamlit as st
+
+from images import THUMBNAIL_WIDTH, image_prefetcher, image_usable, is_image_url
+from timing import timed
+
+GRID_COLUMNS = 4
+GRID_ROWS = 3
+PAGE_SIZE = GRID_COLUMNS * GRID_ROWS
+THUMBNAIL_WAIT = 3  # seconds to wait for uncached thumbnails before rendering
+PLACEHOLDER_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Not_Available.png")
+
+
+def open_product(index):
+    """Show the clicked product (a thumbnail or a search hit) in the detail view."""
+    st.session_state.current_product = index
+    st.session_state.view_mode = "detail"
+
+
+def change_grid_page(step, page_count):
+    st.session_state.grid_page = (st.session_state.grid_page + step) % page_count
+
+
+def page_indices(order, count, start):
+    """Row indices on the page starting at ``start`` of ``order`` (or of all rows)."""
+    if order is None:
+        return list(range(start, min(start + PAGE_SIZE, count)))
+    return order[start:start + PAGE_SIZE].tolist()
+
+
+@timed("render_grid")
+def show_thumbnail_grid(products, labels, order=None):
+    """Render one page of thumbnails.
+
+    Only the rows on the visible page are materialized and only their
+    thumbnails are fetched, so a page costs the same for any catalog size.
+    ``order`` optionally restricts and orders the products shown. ``labels``
+    holds the localized ``open``, ``prev``, ``next`` and ``page`` (a format
+    string with ``page`` and ``pages``) texts.
+    """
+    count = len(products) if order is None else len(order)
+    page_count = max(1, -(-count // PAGE_SIZE))
+    page = min(st.session_state.grid_page, page_count - 1)
+    start = page * PAGE_SIZE
+    indices = page_indices(order, count, start)
+    rows = products.take(indices, columns=["name", "image link"])
+    for index, row in zip(indices, rows):
+        if not image_usable(products, index):
+            row["image link"] = None  # Known broken: show the placeholder without trying it
+
+    with timed("fetch_thumbnails"):
+        thumbnails = image_prefetcher.fetch_many(
+            [row["image link"] for row in rows if is_image_url(row["image link"])],
+            THUMBNAIL_WIDTH, timeout=THUMBNAIL_WAIT
+        )
+    # Warm the cache for the next page while this one is being looked at
+    next_indices = page_indices(order, count, (start + PAGE_SIZE) % (page_count * PAGE_SIZE))
+    image_prefetcher.prefetch(
+        [url for index, url in zip(next_indices, products.column("image link").take(next_indices).to_pylist())
+         if is_image_url(url) and image_usable(products, index)],
+        THUMBNAIL_WIDTH
+    )
+
+    for row_start in range(0, len(rows), GRID_COLUMNS):
+        for offset, column in enumerate(st.columns(GRID_COLUMNS)):
+            position = row_start + offset
+            if position >= len(rows):
+                break
+            row = rows[position]
+            with column:
+                st.image(thumbnails.get(row["image link"]) or PLACEHOLDER_IMAGE, width=THUMBNAIL_WIDTH)
+                st.caption(row["name"])
+                st.button(labels["open"], key=f"open_product_{indices[position]}",
+                          on_click=open_product, args=(indices[position],))
+
+    if page_count > 1:
+        col1, col2, col3 = st.columns([1, 4, 1])
+        with col1:
+            st.button(labels["prev"], key="prev_page", on_click=change_grid_page, args=(-1, page_count))
+        with col2:
+            st.markdown(
+                f"<p style='text-align: center;'>{labels['page'].format(page=page + 1, pages=page_count)}</p>",
+                unsafe_allow_html=True
+            )
+        with col3:
+            st.button(labels["next"], key="next_page", on_click=change_grid_page, args=(1, page_count))
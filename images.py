@@ -0,0 +1,264 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from concurrency import HostBusy, SingleFlight, host_limiter, pooled_session
+
+CACHE_DIR = os.environ.get(
+    "GALLERY_IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "product-gallery-images")
+)
+DEFAULT_MAX_MB = 200
+PREFETCH_RADIUS = 3
+THUMBNAIL_WIDTH = 160  # Grid thumbnails, and the width the link check treats as cached
+RETRY_FAILED_AFTER = 300  # seconds
+
+
+class ImageCache:
+    """LRU cache of resized images on disk, bounded by a byte budget.
+
+    Read-only directories of images stored under the same names (e.g. an
+    opened catalog bundle) are looked up after the cache itself and never
+    evicted.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # file name -> size, least recently used first
+        self._bytes = 0
+        self._read_only = []
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._bytes += size
+
+    @staticmethod
+    def key(url, width):
+        return hashlib.sha1(f"{width}:{url}".encode()).hexdigest()
+
+    def add_read_only(self, directory):
+        with self._lock:
+            if directory not in self._read_only:
+                self._read_only.append(directory)
+
+    def _read_only_path(self, name):
+        for directory in list(self._read_only):
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def has(self, url, width):
+        name = self.key(url, width)
+        with self._lock:
+            if name in self._entries:
+                return True
+        return self._read_only_path(name) is not None
+
+    def get(self, url, width):
+        """Return the cached image bytes or None."""
+        name = self.key(url, width)
+        with self._lock:
+            cached = name in self._entries
+            if cached:
+                self._entries.move_to_end(name)
+        if not cached:
+            path = self._read_only_path(name)
+            if path is None:
+                return None
+            try:
+                with open(path, "rb") as f:
+                    return f.read()
+            except OSError:
+                return None
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # keeps LRU order across restarts
+        except OSError:
+            with self._lock:
+                self._bytes -= self._entries.pop(name, 0)
+            return None
+        return data
+
+    def put(self, url, width, data):
+        name = self.key(url, width)
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._bytes -= self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._bytes += len(data)
+            evicted = []
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old_name, size = self._entries.popitem(last=False)
+                self._bytes -= size
+                evicted.append(old_name)
+        for old_name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, old_name))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+def resize_image(data, width):
+    """Downsize encoded image bytes to at most ``width`` pixels wide."""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    # Let the JPEG decoder downscale while decoding instead of after
+    image.draft("RGB", (width, image.height * width // image.width + 1))
+    if image.width > width:
+        image.thumbnail((width, image.height * width // image.width + 1))
+    out = io.BytesIO()
+    if image.mode in ("RGBA", "LA", "P"):
+        image.save(out, format="PNG", optimize=True)
+    else:
+        image.convert("RGB").save(out, format="JPEG", quality=85, optimize=True)
+    return out.getvalue()
+
+
+def image_mime(data):
+    return "image/png" if data.startswith(b"\x89PNG") else "image/jpeg"
+
+
+class ImagePrefetcher:
+    """Download, resize and cache product images on a background thread pool.
+
+    Concurrent requests for the same image share one download, and each
+    host gets at most a few connections so one slow CDN can't occupy every
+    worker.
+    """
+
+    def __init__(self, cache, max_workers=8, timeout=(5, 15)):
+        self.cache = cache
+        self.timeout = timeout
+        self.session = pooled_session(max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-prefetch")
+        self._pending = set()
+        self._failed = {}  # (url, width) -> time of the last failure
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def get(self, url, width):
+        """Return cached bytes for ``url`` at ``width`` or None."""
+        return self.cache.get(url, width)
+
+    def fetch(self, url, width):
+        """Download and cache one image synchronously; returns its bytes or None."""
+        data = self.cache.get(url, width)
+        if data is not None:
+            return data
+        return self._flights.do((url, width), lambda: self._download(url, width))
+
+    def _download(self, url, width):
+        data = self.cache.get(url, width)  # Stored by a flight that just finished
+        if data is not None:
+            return data
+        try:
+            with host_limiter.slot(url):
+                response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            data = resize_image(response.content, width)
+        except HostBusy:
+            return None  # The host is saturated, not the image broken; retry on a later request
+        except Exception:
+            with self._lock:
+                self._failed[(url, width)] = time.monotonic()
+            return None
+        self.cache.put(url, width, data)
+        return data
+
+    def fetch_many(self, urls, width, timeout=None):
+        """Fetch several images in parallel, waiting at most ``timeout`` seconds.
+
+        Returns a dict of url -> bytes for the images that were ready in time;
+        the rest keep downloading in the background.
+        """
+        urls = list(dict.fromkeys(urls))
+        images = {}
+        futures = {}
+        for url in urls:
+            data = self.cache.get(url, width)
+            if data is not None:
+                images[url] = data
+            else:
+                futures[self._executor.submit(self.fetch, url, width)] = url
+        if futures:
+            done, _ = wait(futures, timeout=timeout)
+            for future in done:
+                if future.result() is not None:
+                    images[futures[future]] = future.result()
+        return images
+
+    def prefetch(self, urls, width):
+        """Queue downloads for any of ``urls`` that are not cached yet."""
+        now = time.monotonic()
+        for url in urls:
+            if self.cache.has(url, width):
+                continue
+            key = (url, width)
+            with self._lock:
+                if key in self._pending or now - self._failed.get(key, -RETRY_FAILED_AFTER) < RETRY_FAILED_AFTER:
+                    continue
+                self._pending.add(key)
+            self._executor.submit(self._prefetch_one, url, width)
+
+    def _prefetch_one(self, url, width):
+        try:
+            self.fetch(url, width)
+        finally:
+            with self._lock:
+                self._pending.discard((url, width))
+
+
+def is_image_url(value):
+    return isinstance(value, str) and value.startswith("http")
+
+
+def image_usable(products, row):
+    """False when the load-time link check (see ``linkcheck.py``) found the row's image link broken.
+
+    A single lookup in the catalog's status array; True while unchecked.
+    """
+    health = products.built_index("link_health")
+    return health is None or health.usable(row)
+
+
+def neighbour_image_urls(products, index, radius=PREFETCH_RADIUS, order=None):
+    """Image links of the products within ``radius`` of position ``index`` in ``order`` (wrapping around).
+
+    ``order`` is the row order Next/Prev walk (a filter or sort); without
+    one it is the catalog's own order. Only the ``image link`` column of
+    those rows is read.
+    """
+    count = len(products) if order is None else len(order)
+    if not count:
+        return []
+    positions = dict.fromkeys((index + offset) % count for offset in sorted(range(-radius, radius + 1), key=abs))
+    rows = [position if order is None else int(order[position]) for position in positions]
+    rows = [row for row in rows if image_usable(products, row)]
+    urls = [product["image link"] for product in products.take(rows, columns=["image link"])]
+    return [url for url in dict.fromkeys(urls) if is_image_url(url)]
+
+image_cache = ImageCache(CACHE_DIR, int(os.environ.get("GALLERY_IMAGE_CACHE_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+image_prefetcher = ImagePrefetcher(image_cache)
@@ -0,0 +1,363 @@
+import io
+import os
+import queue
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+
+import pyarrow as pa
+
+from catalog import dataframe_to_table
+from timing import phase_timer
+
+CHUNK_ROWS = 5000
+DEFAULT_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+PARSE_WORKERS = int(os.environ.get("GALLERY_PARSE_WORKERS", DEFAULT_PARSE_WORKERS))  # 0 parses workbooks in-process
+XLSX_ENGINE = os.environ.get("GALLERY_XLSX_ENGINE", "auto")  # "openpyxl", "calamine" or "auto"
+WARM_PARSE_POOL = os.environ.get("GALLERY_WARM_PARSE_POOL", "") not in ("", "0")  # start the workers with the server
+WORKER_POLL = 1  # seconds between checks that a parse worker is still alive
+
+
+def iter_csv_chunks(file, chunk_rows=CHUNK_ROWS):
+    """Yield dataframes of at most ``chunk_rows`` rows from a CSV file."""
+    import pandas as pd
+
+    # Read everything as text so every chunk has the same column types
+    yield from pd.read_csv(file, chunksize=chunk_rows, dtype=str)
+
+
+def workbook_sheet_names(file):
+    """Names of a workbook's sheets, read from its ``xl/workbook.xml``.
+
+    Loading the workbook instead (even read-only) parses every shared
+    string, seconds of this process's GIL for a big upload that a parse
+    worker reads again anyway.
+    """
+    import zipfile
+    from xml.etree import ElementTree
+
+    try:
+        with zipfile.ZipFile(file) as archive:
+            workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    finally:
+        file.seek(0)
+    # Match the local name: strict OOXML files use another namespace than transitional ones
+    return [element.get("name") for element in workbook.iter() if element.tag.rpartition("}")[2] == "sheet"]
+
+
+def xlsx_engine():
+    """The workbook reader to use: python-calamine (Rust) when installed, else openpyxl."""
+    if XLSX_ENGINE != "auto":
+        return XLSX_ENGINE
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return "openpyxl"
+    return "calamine"
+
+
+def _openpyxl_rows(file, sheet_name, on_size):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0] if sheet_name is None else workbook[sheet_name]
+        if on_size is not None and sheet.max_row:
+            on_size(sheet.max_row - 1)
+        for row in sheet.iter_rows(values_only=True):
+            yield [None if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def _calamine_rows(file, sheet_name, on_size):
+    from python_calamine import CalamineWorkbook
+
+    workbook = CalamineWorkbook.from_filelike(file)
+    sheet = workbook.get_sheet_by_index(0) if sheet_name is None else workbook.get_sheet_by_name(sheet_name)
+    if on_size is not None:
+        on_size(sheet.height - 1)
+    for row in sheet.iter_rows():
+        yield [_calamine_text(value) for value in row]
+
+
+def _calamine_text(value):
+    # calamine reads empty cells as "" and whole numbers as floats; match openpyxl
+    if value == "" or value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def iter_xlsx_chunks(file, chunk_rows=CHUNK_ROWS, sheet_name=None, on_size=None):
+    """Yield dataframes from a sheet of a workbook (the first by default), streaming rows.
+
+    ``on_size`` is called with the sheet's (approximate) row count before
+    the first chunk, when the reader knows it.
+    """
+    import pandas as pd
+
+    rows = (_calamine_rows if xlsx_engine() == "calamine" else _openpyxl_rows)(file, sheet_name, on_size)
+    try:
+        header = next(rows, None)
+        if header is None:
+            yield pd.DataFrame()
+            return
+        columns = [
+            f"Unnamed: {i}" if name is None else str(name) for i, name in enumerate(header)
+        ]
+        batch = []
+        yielded = False
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            if len(batch) == chunk_rows:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+                yielded = True
+        if batch or not yielded:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        rows.close()
+
+
+_pool = None
+_manager = None
+_pool_lock = threading.Lock()
+
+
+@contextmanager
+def _without_main_script():
+    """Start processes in the block without the app script.
+
+    A spawned process first re-runs ``__main__`` from its path, and under
+    Streamlit that is the app script: every worker would import Streamlit
+    and run the page. With a bare ``__main__`` they import only what the
+    tasks they're sent need (this module).
+    """
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = bare = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        if sys.modules["__main__"] is bare:  # Unless a script run swapped in its own meanwhile
+            sys.modules["__main__"] = main
+
+
+def _parse_pool():
+    """Process pool (and the manager for its queues) for workbook parsing, started on first use."""
+    global _pool, _manager
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # Fresh interpreters rather than forks of a multi-threaded server
+            context = multiprocessing.get_context("spawn")
+            with _without_main_script():
+                _manager = context.Manager()
+            _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=context)
+        return _pool, _manager
+
+
+def _submit(fn, *args, shared=lambda manager: ()):
+    """Submit ``fn(*args, *shared(manager))`` to the parse pool; return its future and the shared objects.
+
+    A worker that dies (killed, out of memory) breaks the whole pool, and
+    every later submit would fail. The pool and its manager are then
+    replaced and the task submitted once more; ``shared`` makes the task's
+    queues and events, so the retry gets them from the new manager.
+    """
+    from concurrent.futures.process import BrokenProcessPool
+
+    for retry in (False, True):
+        pool, manager = _parse_pool()
+        objects = shared(manager)
+        try:
+            # The pool starts a worker process on submit while it has fewer than it may
+            with _pool_lock, _without_main_script():
+                return pool.submit(fn, *args, *objects), objects
+        except BrokenProcessPool:
+            if retry:
+                raise
+            _reset_parse_pool(pool)
+
+
+def _reset_parse_pool(broken):
+    """Drop the ``broken`` pool and its manager, so the next use starts new ones."""
+    global _pool, _manager
+    with _pool_lock:
+        if _pool is not broken:  # Another upload already replaced it
+            return
+        manager, _pool, _manager = _manager, None, None
+    broken.shutdown(wait=False, cancel_futures=True)
+    manager.shutdown()
+
+
+def _warm_worker():
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+
+    if xlsx_engine() == "calamine":
+        import python_calamine  # noqa: F401
+
+
+def warm_parse_pool():
+    """Start every parse worker and its imports in the background, so the first upload doesn't wait for them.
+
+    Off unless ``GALLERY_WARM_PARSE_POOL`` is set: each worker holds
+    pandas and openpyxl (about 110 MB), which a front end that never gets
+    a workbook would pay for nothing. Without it the pool starts on the
+    first workbook upload.
+    """
+    if PARSE_WORKERS <= 0 or not WARM_PARSE_POOL:
+        return
+
+    def warm():
+        for future, _ in [_submit(_warm_worker) for _ in range(PARSE_WORKERS)]:
+            future.result()
+
+    threading.Thread(target=warm, name="parse-pool-warmup", daemon=True).start()
+
+
+def _parse_in_worker(data, sheet_name, chunk_rows, chunks, cancel):
+    """Worker process side of ``iter_xlsx_tables``: put each chunk on ``chunks`` as Arrow IPC bytes."""
+    try:
+        for df in iter_xlsx_chunks(io.BytesIO(data), chunk_rows, sheet_name, on_size=lambda rows: chunks.put(("size", rows))):
+            if cancel.is_set():
+                return
+            table = dataframe_to_table(df)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            chunks.put(("chunk", sink.getvalue().to_pybytes()))
+        chunks.put(("done", None))
+    except Exception as e:
+        chunks.put(("error", f"{type(e).__name__}: {e}"))
+
+
+def iter_xlsx_tables(file, chunk_rows=CHUNK_ROWS, sheet_name=None, on_size=None):
+    """Yield Arrow tables from a sheet of a workbook parsed in a worker process.
+
+    Parsing a workbook is CPU-bound Python; in a worker process it doesn't
+    hold this process's GIL, so other sessions stay responsive while a big
+    upload is read. Closing the generator early (the upload was reset)
+    stops the worker after its current chunk.
+    """
+    future, (chunks, cancel) = _submit(
+        _parse_in_worker, file.getvalue(), sheet_name, chunk_rows,
+        shared=lambda manager: (manager.Queue(), manager.Event()),
+    )
+    try:
+        while True:
+            try:
+                kind, value = chunks.get(timeout=WORKER_POLL)
+            except queue.Empty:
+                if future.done():
+                    future.result()  # Raises if the worker died
+                    raise RuntimeError("workbook parser stopped without a result")
+                continue
+            if kind == "size":
+                if on_size is not None:
+                    on_size(value)
+            elif kind == "chunk":
+                yield pa.ipc.open_stream(value).read_all()
+            elif kind == "error":
+                raise ValueError(value)
+            else:
+                return
+    finally:
+        try:
+            cancel.set()
+        except (OSError, EOFError):
+            pass  # The pool broke and its manager was shut down: there is no worker left to stop
+
+
+def iter_workbook_chunks(file, chunk_rows=CHUNK_ROWS, sheet_name=None, on_size=None):
+    """Chunks of a workbook sheet: Arrow tables from the parse pool, or dataframes without one."""
+    if PARSE_WORKERS > 0:
+        return iter_xlsx_tables(file, chunk_rows, sheet_name, on_size)
+    return iter_xlsx_chunks(file, chunk_rows, sheet_name, on_size)
+
+
+def iter_chunks(file, chunk_rows=CHUNK_ROWS, on_size=None):
+    """Pick the chunked reader matching the uploaded file's extension."""
+    if file.name.endswith(".csv"):
+        return iter_csv_chunks(file, chunk_rows)
+    return iter_workbook_chunks(file, chunk_rows, on_size=on_size)
+
+
+def rename_columns(chunk, column_mapping):
+    """Apply ``column_mapping`` to a dataframe or Arrow table chunk."""
+    if isinstance(chunk, pa.Table):
+        return chunk.rename_columns([column_mapping.get(name, name) for name in chunk.column_names])
+    return chunk.rename(columns=column_mapping)
+
+
+def chunk_table(chunk):
+    """A chunk as an Arrow table."""
+    return chunk if isinstance(chunk, pa.Table) else dataframe_to_table(chunk)
+
+
+def _renamed(chunks, column_mapping):
+    try:
+        for chunk in chunks:
+            yield rename_columns(chunk, column_mapping)
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def read_first_chunk(file, column_mapping, chunk_rows=CHUNK_ROWS, on_size=None):
+    """Read only the first chunk of a file.
+
+    Returns the first chunk (a dataframe, or an Arrow table when parsed in
+    the worker pool), with ``column_mapping`` applied, and an iterator over
+    the remaining (also renamed) chunks.
+    """
+    chunks = _renamed(iter_chunks(file, chunk_rows, on_size), column_mapping)
+    first = next(chunks, None)
+    if first is None:
+        import pandas as pd
+
+        first = pd.DataFrame()
+    return first, chunks
+
+
+def load_remaining(catalog, chunks, on_complete=None, transform=None):
+    """Append the remaining chunks to ``catalog`` on a background thread.
+
+    ``transform`` is applied to each chunk's Arrow table, as in
+    ``Catalog.from_dataframe``. ``on_complete`` is called with the catalog
+    once every chunk has been appended without errors.
+    """
+
+    def run():
+        start = time.perf_counter()
+        try:
+            for chunk in chunks:
+                if catalog.cancelled:
+                    return
+                table = chunk_table(chunk)
+                if transform is not None:
+                    table = transform(table)
+                catalog.append(table)
+        except Exception as e:
+            catalog.finish(error=e)
+        else:
+            catalog.compact()
+            catalog.finish()
+            if on_complete is not None:
+                on_complete(catalog)
+            phase_timer.record("load_remaining", (time.perf_counter() - start) * 1000, rows=len(catalog))
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()  # Stops a worker process still parsing a cancelled upload
+
+    thread = threading.Thread(target=run, name="catalog-ingest", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,231 @@
+"""Load-time health check of a catalog's image links.
+
+Every distinct ``image link`` is checked once with a HEAD request (falling
+back to a streamed GET for hosts that refuse HEAD) on a bounded thread
+pool. Checks share the per-host connection cap with image prefetching,
+queueing for a slot where prefetches give up, and take at most all but one
+of a host's slots so the viewer's prefetches still get through while a big
+catalog is checked. Results are cached by URL, so a refreshed or
+re-uploaded catalog only checks links it hasn't seen.
+
+Each catalog gets its rows' link codes and a per-link status array that
+fills in as results arrive; rendering looks up one row's status instead of
+probing the link.
+"""
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from concurrency import HostLimiter, SingleFlight, host_limiter, pooled_session
+from images import THUMBNAIL_WIDTH, image_cache
+from timing import phase_timer
+
+UNCHECKED, OK, BROKEN = 0, 1, 2
+DEFAULT_WORKERS = 16  # 0 turns the check off
+DEFAULT_TTL = 3600  # seconds a URL's result is reused
+MAX_CACHED_URLS = 200_000
+REFUSED_HEAD = (403, 405, 501)  # Hosts that only answer GET
+ABANDON_CHECK_EVERY = 256  # links between checks that the catalog is still wanted
+
+
+class LinkHealth:
+    """Status (``UNCHECKED``, ``OK`` or ``BROKEN``) of a catalog's image links.
+
+    Rows share their link's status: ``codes[row]`` indexes the distinct
+    links (-1 for a missing one) and ``url_status`` holds one status per
+    link. Both are filled in by ``build`` on the checker's thread; until
+    then every row counts as usable.
+    """
+
+    def __init__(self):
+        self.codes = None
+        self.url_status = None
+        self._links = None  # Arrow array of the distinct links
+        self.checked = 0
+        self.done = threading.Event()
+
+    def build(self, catalog):
+        """Encode the catalog's links, with those that aren't http(s) already marked broken."""
+        links = catalog.column("image link")
+        if pa.types.is_dictionary(links.type):
+            links = links.cast(links.type.value_type)
+        encoded = pc.dictionary_encode(links.combine_chunks())
+        checkable = pc.starts_with(encoded.dictionary, "http").to_numpy(zero_copy_only=False)  # as is_image_url
+        self._links = encoded.dictionary
+        self.url_status = np.where(checkable, UNCHECKED, BROKEN).astype(np.uint8)
+        self.codes = encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False).astype(np.int32, copy=False)
+
+    def pending(self):
+        """``(code, link)`` for every http(s) link not checked yet."""
+        for code in np.flatnonzero(self.url_status == UNCHECKED):
+            yield int(code), self._links[code].as_py()
+
+    def set(self, code, result):
+        """Record the result for the link ``code``, and so for all of its rows."""
+        self.url_status[code] = result
+        self.checked += 1
+
+    def usable(self, row):
+        """False when the row's link is missing or known to be broken."""
+        codes = self.codes
+        if codes is None:
+            return True
+        code = codes[row]
+        return code >= 0 and self.url_status[code] != BROKEN
+
+    @property
+    def status(self):
+        """Every row's status, or None before ``build``."""
+        if self.codes is None:
+            return None
+        status = np.full(len(self.codes), BROKEN, dtype=np.uint8)
+        linked = self.codes >= 0
+        status[linked] = self.url_status[self.codes[linked]]
+        return status
+
+    @property
+    def broken(self):
+        status = self.status
+        return 0 if status is None else int(np.count_nonzero(status == BROKEN))
+
+
+class LinkChecker:
+    """Check image links on a bounded thread pool with per-host limits and a URL result cache."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, limiter=host_limiter, ttl=DEFAULT_TTL, timeout=(3, 10),
+                 is_cached=None):
+        self.workers = workers
+        self.ttl = ttl
+        self.timeout = timeout
+        self.is_cached = is_cached  # Links whose image is already in the image cache need no request
+        self.session = pooled_session(max(workers, 1))
+        self._limiter = limiter
+        self._budget = HostLimiter(max(limiter.max_per_host - 1, 1), wait=None)  # Checks' share of each host
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="link-check")
+        self._results = OrderedDict()  # url -> (status, checked at), least recently used first
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def cached(self, url):
+        """The cached result for ``url``, or None when it is unknown or stale."""
+        with self._lock:
+            result = self._results.get(url)
+            if result is None or time.monotonic() - result[1] > self.ttl:
+                return None
+            self._results.move_to_end(url)
+            return result[0]
+
+    def _remember(self, url, status):
+        with self._lock:
+            self._results[url] = (status, time.monotonic())
+            self._results.move_to_end(url)
+            while len(self._results) > MAX_CACHED_URLS:
+                self._results.popitem(last=False)
+
+    def check(self, url):
+        """``OK`` or ``BROKEN`` for one link, from the cache or a request."""
+        status = self.cached(url)
+        if status is not None:
+            return status
+        return self._flights.do(url, lambda: self._check(url))
+
+    def _check(self, url):
+        if self.is_cached is not None and self.is_cached(url):
+            status = OK
+        else:
+            try:
+                # Every link gets checked, however busy its host
+                with self._budget.slot(url), self._limiter.slot(url, queue=True):
+                    response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+                    if response.status_code in REFUSED_HEAD:
+                        response = self.session.get(url, timeout=self.timeout, stream=True)
+                        response.close()
+                # An HTML page in place of the image is a soft 404 (or a login wall)
+                html = response.headers.get("Content-Type", "").startswith("text/")
+                status = OK if response.ok and not html else BROKEN
+            except Exception:  # Unreachable, or too malformed to request (http://[bad)
+                status = BROKEN
+        self._remember(url, status)
+        return status
+
+    def start(self, catalog):
+        """Create the catalog's ``LinkHealth`` and build and check it in the background.
+
+        The check holds only a weak reference to the catalog and stops once
+        the catalog is cancelled or dropped (replaced, evicted).
+        """
+        health = LinkHealth()
+        threading.Thread(
+            target=self._check_all, args=(weakref.ref(catalog), health), name="link-check", daemon=True,
+        ).start()
+        return health
+
+    def _check_all(self, catalog_ref, health):
+        start = time.perf_counter()
+        in_flight, requested, stopped = {}, 0, False
+        try:
+            catalog = catalog_ref()
+            if catalog is None:
+                return
+            health.build(catalog)
+            del catalog  # From here on only the weak reference, so dropping the catalog ends the check
+            if not self.workers:
+                return
+            for count, (code, url) in enumerate(health.pending()):
+                if count % ABANDON_CHECK_EVERY == 0 and _abandoned(catalog_ref):
+                    stopped = True
+                    break
+                status = self.cached(url)
+                if status is not None:
+                    health.set(code, status)
+                    continue
+                if len(in_flight) >= self.workers * 4:  # Keep the queue short for catalogs with many links
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        health.set(in_flight.pop(future), _result(future))
+                try:
+                    in_flight[self._executor.submit(self.check, url)] = code
+                except RuntimeError:  # The interpreter is shutting down
+                    stopped = True
+                    break
+                requested += 1
+            if stopped:
+                for future in in_flight:
+                    future.cancel()
+            else:
+                for future in as_completed(in_flight):
+                    health.set(in_flight[future], _result(future))
+        finally:
+            health.done.set()  # Rows left unchecked stay usable
+        phase_timer.record("link_check", (time.perf_counter() - start) * 1000, urls=len(health.url_status),
+                           requested=requested, broken=health.broken, stopped=stopped)
+
+
+def _abandoned(catalog_ref):
+    catalog = catalog_ref()
+    return catalog is None or catalog.cancelled
+
+
+def _result(future):
+    try:
+        return future.result()
+    except Exception:
+        return BROKEN  # A check that failed unexpectedly must not stop the others
+
+
+def link_health(catalog):
+    """Return the catalog's link health, starting the check on first use."""
+    return catalog.index("link_health", link_checker.start)
+
+
+link_checker = LinkChecker(
+    workers=int(os.environ.get("GALLERY_LINK_CHECK_WORKERS", DEFAULT_WORKERS)),
+    ttl=float(os.environ.get("GALLERY_LINK_CHECK_TTL", DEFAULT_TTL)),
+    is_cached=lambda url: image_cache.has(url, THUMBNAIL_WIDTH),
+)
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_MB = 256
+KEY_VERSION = 2  # Bump when the same file starts parsing into a different catalog (2: every workbook sheet)
+
+
+def parse_cache_key(data, column_mapping, file_name="", variant=""):
+    """Key a parse by file content, column mapping and file format.
+
+    ``variant`` separates parses of the same file that build different
+    catalogs, e.g. with or without the parsed price columns.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    file_format = os.path.splitext(file_name)[1].lower()
+    return f"v{KEY_VERSION}:{digest}:{file_format}:{json.dumps(column_mapping, sort_keys=True)}:{variant}"
+
+
+class ParseCache:
+    """Process-wide LRU cache of parsed catalogs under a memory budget.
+
+    Cached catalogs are shared by every session that uploads the same file,
+    so they must be treated as read-only once stored. Memory-mapped
+    catalogs live in the page cache rather than the heap and do not count
+    against the budget.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached catalog for ``key`` or None."""
+        with self._lock:
+            catalog = self._entries.get(key)
+            if catalog is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return catalog
+
+    def put(self, key, catalog):
+        """Store a fully loaded catalog, evicting least recently used ones."""
+        size = _heap_bytes(catalog)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= _heap_bytes(previous)
+            self._entries[key] = catalog
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _heap_bytes(evicted)
+
+    def discard(self, key):
+        with self._lock:
+            catalog = self._entries.pop(key, None)
+            if catalog is not None:
+                self._bytes -= _heap_bytes(catalog)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def _heap_bytes(catalog):
+    return 0 if catalog.memory_mapped else catalog.nbytes
+
+
+parse_cache = ParseCache(int(os.environ.get("GALLERY_PARSE_CACHE_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
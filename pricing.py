@@ -0,0 +1,96 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Optional currency before or after the amount, e.g. "2115 SAR", "SAR 250", "$1,250.50", "250 ر.س"; a
+# currency is letters (with dots between them) or a currency symbol, and commas only separate groups of
+# thousands. Anything else, a sign or a decimal comma ("1,5 EUR") included, leaves the price unparsed
+# rather than misread
+CURRENCY = r"\p{L}*\p{Sc}|\p{L}+(?:\.\p{L}+)*\.?"
+AMOUNT = r"(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?"
+PRICE_PATTERN = rf"^\s*(?P<pre>{CURRENCY})?\s*(?P<amount>{AMOUNT})\s*(?P<post>{CURRENCY})?\s*$"
+PRICE_COLUMNS = ("price_amount", "price_currency")  # Parsed from ``price`` at load time, not part of the source
+ARABIC_NUMERALS = {
+    **{chr(0x0660 + d): str(d) for d in range(10)},
+    **{chr(0x06F0 + d): str(d) for d in range(10)},
+    "٫": ".",  # Arabic decimal separator
+    "٬": ",",  # Arabic thousands separator
+}
+
+
+def parse_prices(prices):
+    """Split raw price values into numeric amounts and currency codes.
+
+    Works on a whole Arrow column at once and returns ``(amounts, currencies)``
+    as float64 / string arrays, with nulls where a price could not be parsed.
+    """
+    if isinstance(prices, pa.ChunkedArray):
+        prices = prices.combine_chunks()
+    text = pc.cast(prices, pa.string())
+    if pc.any(pc.match_substring_regex(text, f"[{''.join(ARABIC_NUMERALS)}]")).as_py():
+        for arabic, ascii_ in ARABIC_NUMERALS.items():
+            text = pc.replace_substring(text, arabic, ascii_)
+    parts = pc.extract_regex(text, PRICE_PATTERN)
+    amounts = pc.cast(_empty_to_null(pc.replace_substring(parts.field("amount"), ",", "")), pa.float64())
+    currencies = pc.utf8_upper(pc.if_else(
+        pc.not_equal(parts.field("post"), ""), parts.field("post"), parts.field("pre")
+    ))
+    return amounts, _empty_to_null(currencies)
+
+
+def _empty_to_null(strings):
+    # Rows that did not match the pattern, and currencies that were absent, come back as empty strings
+    return pc.if_else(pc.equal(strings, ""), pa.scalar(None, pa.string()), strings)
+
+
+def with_price_columns(table):
+    """Append ``price_amount`` and ``price_currency`` columns parsed from ``price``."""
+    amounts, currencies = parse_prices(table.column("price"))
+    amount_column, currency_column = PRICE_COLUMNS
+    return table.append_column(amount_column, amounts).append_column(currency_column, currencies)
+
+
+class PriceIndex:
+    """Row indices sorted by price, for range filters and ordering by binary search."""
+
+    def __init__(self, amounts, unparsed):
+        priced = np.flatnonzero(~np.isnan(amounts))
+        self.order = priced[np.argsort(amounts[priced], kind="stable")].astype(np.int32)
+        self.sorted_amounts = amounts[self.order]
+        self.unparsed = unparsed
+
+    @classmethod
+    def build(cls, catalog):
+        if "price_amount" in catalog.columns:
+            amounts = catalog.column("price_amount")
+        else:
+            amounts, _ = parse_prices(catalog.column("price"))
+        unparsed = pc.sum(pc.and_(pc.is_valid(catalog.column("price")), pc.is_null(amounts))).as_py() or 0
+        return cls(amounts.to_numpy(zero_copy_only=False).astype(np.float64), unparsed)  # nulls -> NaN
+
+    def __len__(self):
+        """Number of rows with a parsed price."""
+        return len(self.order)
+
+    @property
+    def min(self):
+        return float(self.sorted_amounts[0]) if len(self.order) else None
+
+    @property
+    def max(self):
+        return float(self.sorted_amounts[-1]) if len(self.order) else None
+
+    def range(self, low, high, descending=False):
+        """Rows priced within ``[low, high]``, in ascending or descending price order.
+
+        A None bound leaves that end open; rows without a parsed price are never included.
+        """
+        start = 0 if low is None else np.searchsorted(self.sorted_amounts, low, side="left")
+        stop = len(self.order) if high is None else np.searchsorted(self.sorted_amounts, high, side="right")
+        rows = self.order[start:stop]
+        return rows[::-1] if descending else rows
+
+
+def price_index(catalog):
+    """Return the catalog's price index, building it on first use."""
+    return catalog.index("price", PriceIndex.build)
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+import weakref
+
+DEFAULT_IDLE_SECONDS = 600
+
+
+class _Entry:
+    def __init__(self, catalog, on_evict):
+        self.catalog = catalog
+        self.on_evict = on_evict
+        self.refs = 0
+        self.idle_since = time.monotonic()
+
+
+class CatalogRegistry:
+    """Process-wide registry of shared, read-only catalogs.
+
+    Sessions that load the same source share one catalog: each holds a
+    ``CatalogHandle`` (a reference count on the catalog) instead of a catalog
+    of its own, and keeps only its cursor and filters in session state. A
+    catalog nobody holds is evicted once it has been idle for
+    ``idle_timeout`` seconds; ``on_evict`` lets the caches that loaded it
+    drop their references too.
+    """
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_SECONDS):
+        self.idle_timeout = idle_timeout
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the usable catalog registered under ``key``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry.catalog.cancelled or entry.catalog.error:
+            return None
+        return entry.catalog
+
+    def acquire(self, key, catalog, on_evict=None):
+        """Register ``catalog`` under ``key`` (if it is not already) and return a handle to it.
+
+        A different catalog for a known key (e.g. a sheet that changed)
+        replaces the registered one for new sessions; handles to the old one
+        keep it alive until they are released.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(catalog, on_evict)
+            elif entry.catalog is not catalog:
+                entry.catalog = catalog
+                entry.on_evict = on_evict or entry.on_evict
+            entry.refs += 1
+        self.evict_idle()
+        return CatalogHandle(self, key, catalog)
+
+    def _release(self, key, catalog):
+        """Drop one reference; returns True when no session holds ``catalog`` any more."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return True
+            entry.refs -= 1
+            if entry.refs <= 0:
+                entry.refs = 0
+                entry.idle_since = time.monotonic()
+            last = entry.refs == 0 or entry.catalog is not catalog
+        self.evict_idle()
+        return last
+
+    def evict_idle(self):
+        """Drop catalogs that no session has held for ``idle_timeout`` seconds.
+
+        Cancelled loads go as soon as nobody holds them.
+        """
+        now = time.monotonic()
+        with self._lock:
+            evicted = [
+                (key, entry) for key, entry in self._entries.items()
+                if entry.refs == 0 and (entry.catalog.cancelled or now - entry.idle_since >= self.idle_timeout)
+            ]
+            for key, _ in evicted:
+                del self._entries[key]
+        for key, entry in evicted:
+            if entry.on_evict is not None:
+                entry.on_evict()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "catalogs": len(self._entries),
+                "handles": sum(entry.refs for entry in self._entries.values()),
+                "bytes": sum(entry.catalog.nbytes for entry in self._entries.values()),
+            }
+
+
+class CatalogHandle:
+    """A session's reference to a shared catalog.
+
+    Stands in for the catalog itself (``len()``, indexing, ``column()``,
+    ``complete`` ...), so views don't need to know about sharing. The
+    reference is released with ``release()`` or when the session's state is
+    garbage collected.
+    """
+
+    def __init__(self, registry, key, catalog):
+        self.key = key
+        self.catalog = catalog
+        self._release = weakref.finalize(self, registry._release, key, catalog)
+
+    def release(self):
+        """Give up this session's reference; returns True if it was the last one."""
+        return bool(self._release())
+
+    def __getattr__(self, name):
+        return getattr(self.catalog, name)
+
+    def __len__(self):
+        return len(self.catalog)
+
+    def __getitem__(self, index):
+        return self.catalog[index]
+
+    def __iter__(self):
+        return iter(self.catalog)
+
+
+catalog_registry = CatalogRegistry(float(os.environ.get("GALLERY_CATALOG_IDLE_SECONDS", DEFAULT_IDLE_SECONDS)))
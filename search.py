@@ -0,0 +1,194 @@
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+import pyarrow as pa
+
+# Harakat, Quranic marks, superscript alef and tatweel
+ARABIC_MARKS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+ARABIC_FOLDS = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي", "ؤ": "و", "ة": "ه",
+    **{chr(0x0660 + d): str(d) for d in range(10)},  # Arabic-Indic digits
+    **{chr(0x06F0 + d): str(d) for d in range(10)},  # Eastern Arabic-Indic digits
+})
+TOKEN = re.compile(r"\w+")
+SEARCH_COLUMNS = ("name", "details")
+NO_MATCHES = np.empty(0, dtype=np.int32)
+MIN_PREFIX = 2  # shorter last tokens only match whole words
+MAX_PREFIX_EXPANSION = 256
+DENSE_RATIO = 16  # tokens in more than 1/16 of the rows are filtered with a mask
+MAX_CACHED_MASKS = 32
+
+
+def normalize(text):
+    """Fold case, Arabic letter variants and digits, and strip diacritics."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return ARABIC_MARKS.sub("", text).translate(ARABIC_FOLDS)
+
+
+def tokenize(text):
+    return TOKEN.findall(normalize(text))
+
+
+class SearchIndex:
+    """Inverted index from normalized tokens to sorted row indices.
+
+    Every query token must match (AND). The last token also matches as a
+    prefix, so results update while the user is still typing.
+
+    All posting lists live in one flat array: the rows of the i-th token of
+    the sorted vocabulary are ``rows[offsets[i]:offsets[i + 1]]``.
+    """
+
+    def __init__(self, vocabulary, rows, offsets, row_count):
+        self._vocabulary = vocabulary
+        self._rows = rows
+        self._offsets = offsets
+        self._row_count = row_count
+        self._masks = {}
+        self._masks_lock = threading.Lock()
+
+    @classmethod
+    def build(cls, catalog, columns=SEARCH_COLUMNS):
+        postings = _tokenize_rows(catalog, columns)
+        vocabulary = sorted(postings)
+        lengths = [len(postings[token]) for token in vocabulary]
+        rows = np.fromiter((row for token in vocabulary for row in postings[token]), dtype=np.int32, count=sum(lengths))
+        return cls(vocabulary, rows, np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]), len(catalog))
+
+    def updated(self, diff, catalog, columns=SEARCH_COLUMNS):
+        """Index for ``catalog``, a refresh of this index's catalog described by ``diff``.
+
+        Postings of unchanged rows are renumbered in bulk; only the inserted
+        and updated rows are tokenized again.
+        """
+        remap = diff.unchanged_old_to_new().astype(np.int32)
+        rows = remap[self._rows]
+        token_ids = np.repeat(np.arange(len(self._vocabulary)), np.diff(self._offsets))
+        kept = rows >= 0
+        rows, token_ids = rows[kept], token_ids[kept]
+
+        vocabulary = self._vocabulary
+        fresh = _tokenize_rows(catalog, columns, np.flatnonzero(diff.changed))
+        new_tokens = sorted(token for token in fresh if self._token_id(token) is None)
+        if new_tokens:
+            # Both runs are sorted, so this is a linear merge
+            vocabulary = sorted(vocabulary + new_tokens)
+            # Shift old ids past the new tokens sorted before them
+            new_positions = np.array([bisect_left(vocabulary, token) for token in new_tokens])
+            token_ids = token_ids + np.searchsorted(new_positions - np.arange(len(new_tokens)), token_ids, side="right")
+        if fresh:
+            fresh_ids = np.repeat([bisect_left(vocabulary, token) for token in fresh], [len(r) for r in fresh.values()])
+            rows = np.concatenate([rows, np.fromiter((row for r in fresh.values() for row in r), dtype=np.int32)])
+            token_ids = np.concatenate([token_ids, fresh_ids])
+        if fresh or not np.all(np.diff(remap[remap >= 0]) > 0):
+            order = np.lexsort((rows, token_ids))
+            rows, token_ids = rows[order], token_ids[order]
+        lengths = np.bincount(token_ids, minlength=len(vocabulary))
+        if not lengths.all():
+            # Drop tokens that only deleted or updated rows had
+            kept_tokens = np.flatnonzero(lengths)
+            vocabulary = [vocabulary[i] for i in kept_tokens.tolist()]
+            lengths = lengths[kept_tokens]
+        return SearchIndex(vocabulary, rows, np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]), len(catalog))
+
+    def _token_id(self, token):
+        i = bisect_left(self._vocabulary, token)
+        return i if i < len(self._vocabulary) and self._vocabulary[i] == token else None
+
+    def _posting(self, token):
+        """Sorted rows containing ``token``, or None for an unknown token."""
+        i = self._token_id(token)
+        return None if i is None else self._rows[self._offsets[i]:self._offsets[i + 1]]
+
+    def _prefix_tokens(self, prefix):
+        start = bisect_left(self._vocabulary, prefix)
+        tokens = []
+        for token in self._vocabulary[start:start + MAX_PREFIX_EXPANSION]:
+            if not token.startswith(prefix):
+                break
+            tokens.append(token)
+        return tokens
+
+    def _mask(self, tokens):
+        """Boolean row mask of the rows containing any of ``tokens``."""
+        key = tuple(tokens)
+        with self._masks_lock:
+            mask = self._masks.pop(key, None)
+            if mask is None:
+                mask = np.zeros(self._row_count, dtype=bool)
+                for token in tokens:
+                    mask[self._posting(token)] = True
+                if len(self._masks) >= MAX_CACHED_MASKS:
+                    self._masks.pop(next(iter(self._masks)))
+            self._masks[key] = mask  # most recently used last
+        return mask
+
+    def search(self, query):
+        """Return the sorted row indices matching every token of ``query``."""
+        tokens = tokenize(query)
+        if not tokens:
+            return NO_MATCHES
+        groups = [[token] for token in tokens[:-1]]
+        last = tokens[-1]
+        prefix_tokens = self._prefix_tokens(last) if len(last) >= MIN_PREFIX else []
+        groups.append(prefix_tokens or [last])
+        postings = {token: self._posting(token) for group in groups for token in group}
+        if any(rows is None for rows in postings.values()):
+            return NO_MATCHES
+
+        # Start from the rarest token and filter by the others: binary search
+        # against small posting lists, a cached row mask for frequent ones
+        sized = sorted(groups, key=lambda group: sum(len(postings[t]) for t in group))
+        first = sized[0]
+        if len(first) == 1:
+            result = postings[first[0]]
+        else:
+            result = np.flatnonzero(self._mask(first)).astype(np.int32)
+        for group in sized[1:]:
+            if not len(result):
+                break
+            if len(group) == 1 and len(postings[group[0]]) * DENSE_RATIO < self._row_count:
+                result = _intersect(result, postings[group[0]])
+            else:
+                result = result[self._mask(group)[result]]
+        return result
+
+
+def _tokenize_rows(catalog, columns, rows=None):
+    """Map each token to the (ascending) rows containing it, for all rows or only ``rows``."""
+    columns = [column for column in columns if column in catalog.columns]
+    if rows is None:
+        rows = range(len(catalog))
+        values = zip(*(catalog.column(column).to_pylist() for column in columns))
+    else:
+        taken = pa.array(rows, type=pa.int64())
+        values = zip(*(catalog.column(column).take(taken).to_pylist() for column in columns))
+    postings = defaultdict(list)
+    for row, texts in zip(rows, values):
+        text = " ".join(str(value) for value in texts if value is not None)
+        for token in set(tokenize(text)):
+            postings[token].append(int(row))
+    return postings
+
+
+def _intersect(small, large):
+    """Intersect sorted unique arrays with a binary search per element of ``small``."""
+    if not len(small) or not len(large):
+        return NO_MATCHES
+    positions = np.minimum(np.searchsorted(large, small), len(large) - 1)
+    return small[large[positions] == small]
+
+
+def search_index(catalog):
+    """Return the catalog's search index, building it on first use."""
+    return catalog.index("search", SearchIndex.build)
+
+
+def warm_search_index(catalog):
+    """Build the search index on a background thread after a catalog loads."""
+    threading.Thread(target=search_index, args=(catalog,), name="search-index", daemon=True).start()
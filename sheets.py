@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+
+from urllib.parse import quote
+
+from concurrency import SingleFlight, host_limiter, pooled_session
+
+GVIZ_URL = os.environ.get(
+    "GALLERY_GVIZ_URL",
+    "https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet={sheet_name}",
+)
+DEFAULT_TTL = 60
+
+
+class _SheetEntry:
+    def __init__(self, result, etag, last_modified):
+        self.result = result
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.monotonic()
+
+
+class SheetFetcher:
+    """Fetch Google Sheet tabs over a pooled HTTP session, caching parsed results.
+
+    Results are kept per ``(sheet_id, sheet_name, variant)``, where the
+    caller's ``variant`` names how it parses the sheet (columns required,
+    columns derived), so callers parsing the same tab differently don't get
+    each other's results. Within ``ttl`` seconds a
+    cached result is returned without any request; after that the sheet is
+    revalidated with ETag / If-Modified-Since and a 304 answer reuses the
+    cached result instead of downloading and parsing the sheet again.
+    Concurrent fetches of the same sheet share one request.
+    """
+
+    def __init__(self, url_template=GVIZ_URL, ttl=DEFAULT_TTL, timeout=(5, 30), pool_size=10):
+        self.url_template = url_template
+        self.ttl = ttl
+        self.timeout = timeout
+        self.session = pooled_session(pool_size)
+        self.fresh_hits = 0
+        self.not_modified = 0
+        self.downloads = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def url(self, sheet_id, sheet_name):
+        return self.url_template.format(sheet_id=sheet_id, sheet_name=quote(sheet_name))
+
+    def fetch(self, sheet_id, sheet_name, parse, on_download=None, revalidate=False, variant=""):
+        """Return ``parse(content)`` for the sheet, reusing cached results.
+
+        ``parse`` receives the raw CSV bytes. A ``None`` result (e.g. the sheet
+        failed validation) is returned but not cached. ``on_download`` is
+        called with the new result and its ``ETag``/``Last-Modified`` headers
+        whenever the sheet was actually downloaded and parsed. With
+        ``revalidate`` a cached result is checked with the server even
+        within its TTL.
+        """
+        key = (sheet_id, sheet_name, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+        if not revalidate and entry is not None and time.monotonic() - entry.fetched_at < self.ttl:
+            self.fresh_hits += 1
+            return entry.result
+        return self._flights.do(key, lambda: self._download(key, parse, on_download, revalidate))
+
+    def _download(self, key, parse, on_download, revalidate=False):
+        with self._lock:
+            entry = self._entries.get(key)
+        if not revalidate and entry is not None and time.monotonic() - entry.fetched_at < self.ttl:
+            self.fresh_hits += 1  # Refreshed by a flight that just finished
+            return entry.result
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        url = self.url(*key[:2])
+        with host_limiter.slot(url, queue=True):  # A slow sheet host makes loads slower, not fail
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+
+        if response.status_code == 304 and entry is not None:
+            self.not_modified += 1
+            entry.fetched_at = time.monotonic()
+            return entry.result
+
+        response.raise_for_status()
+        self.downloads += 1
+        result = parse(response.content)
+        if result is not None:
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+            with self._lock:
+                self._entries[key] = _SheetEntry(result, etag, last_modified)
+            if on_download is not None:
+                on_download(result, etag, last_modified)
+        return result
+
+    def has(self, sheet_id, sheet_name, variant=""):
+        with self._lock:
+            return (sheet_id, sheet_name, variant) in self._entries
+
+    def seed(self, sheet_id, sheet_name, result, etag=None, last_modified=None, variant=""):
+        """Register a result restored from elsewhere (e.g. a snapshot on disk).
+
+        The entry starts out stale, so the next ``fetch`` revalidates it and
+        only downloads the sheet again if it changed.
+        """
+        entry = _SheetEntry(result, etag, last_modified)
+        entry.fetched_at = -float("inf")
+        with self._lock:
+            self._entries.setdefault((sheet_id, sheet_name, variant), entry)
+
+    def invalidate(self, sheet_id=None, sheet_name=None):
+        """Forget one cached sheet (every variant of it), or all of them when called without arguments."""
+        with self._lock:
+            if sheet_id is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[:2] == (sheet_id, sheet_name)]:
+                    del self._entries[key]
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "fresh_hits": self.fresh_hits,
+            "not_modified": self.not_modified,
+            "downloads": self.downloads,
+            "coalesced": self._flights.shared,
+        }
+
+
+sheet_fetcher = SheetFetcher(ttl=float(os.environ.get("GALLERY_SHEET_TTL", DEFAULT_TTL)))
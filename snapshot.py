@@ -0,0 +1,110 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+import pyarrow as pa
+
+from catalog import Catalog
+from timing import timed
+
+SNAPSHOT_DIR = os.environ.get(
+    "GALLERY_SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "product-gallery-snapshots")
+)  # set to an empty string to turn snapshots off
+DEFAULT_MAX_MB = 2048
+METADATA_PREFIX = b"gallery."
+
+
+class SnapshotStore:
+    """Parsed catalogs saved as Arrow IPC files and reopened through a memory map.
+
+    Snapshots are keyed by source identity (the parse cache key of an
+    upload, or a Google Sheet id and tab). They are written uncompressed so
+    reopening maps the file instead of reading it: the table's buffers point
+    straight into the OS page cache, which every session and process
+    opening the same snapshot shares. Least recently opened snapshots are
+    deleted once the directory grows past ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest()[:32] + ".arrow")
+
+    def save(self, key, catalog, metadata=None):
+        """Write ``catalog`` under ``key``, with optional string ``metadata``."""
+        if not self.directory:
+            return
+        table = catalog.table
+        if metadata:
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                **{METADATA_PREFIX + name.encode(): str(value).encode() for name, value in metadata.items() if value},
+            })
+        path = self.path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with timed("save_snapshot", rows=len(catalog)):
+            with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp_path, path)
+        self._evict()
+
+    def save_in_background(self, key, catalog, metadata=None):
+        threading.Thread(target=self.save, args=(key, catalog, metadata), name="snapshot-save", daemon=True).start()
+
+    def open(self, key):
+        """Map the snapshot for ``key``; returns ``(catalog, metadata)`` or None."""
+        if not self.directory:
+            return None
+        path = self.path(key)
+        try:
+            with timed("open_snapshot"):
+                table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+            os.utime(path)  # keeps eviction order by last use
+        except (OSError, pa.ArrowInvalid):
+            return None
+        schema_metadata = table.schema.metadata or {}
+        metadata = {
+            name[len(METADATA_PREFIX):].decode(): value.decode()
+            for name, value in schema_metadata.items() if name.startswith(METADATA_PREFIX)
+        }
+        catalog = Catalog(table)
+        catalog.memory_mapped = True
+        return catalog, metadata
+
+    def _evict(self):
+        with self._lock:
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(".arrow"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.path, stat.st_size))
+            total = sum(size for _, _, size in files)
+            for _, path, size in sorted(files)[:-1]:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)  # readers that mapped it keep their pages
+                except OSError:
+                    continue
+                total -= size
+
+    def stats(self):
+        if not self.directory:
+            return {"entries": 0, "bytes": 0, "max_bytes": self.max_bytes}
+        sizes = [entry.stat().st_size for entry in os.scandir(self.directory) if entry.name.endswith(".arrow")]
+        return {"entries": len(sizes), "bytes": sum(sizes), "max_bytes": self.max_bytes}
+
+
+def sheet_snapshot_key(sheet_id, sheet_name, variant=""):
+    return f"sheet:{sheet_id}:{sheet_name}:{variant}"
+
+
+snapshot_store = SnapshotStore(
+    SNAPSHOT_DIR, int(os.environ.get("GALLERY_SNAPSHOT_MB", DEFAULT_MAX_MB)) * 1024 * 1024
+)
@@ -0,0 +1,97 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The gallery's modules live at the repository root and read their cache locations at import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_scratch = tempfile.mkdtemp(prefix="gallery-tests-")
+os.environ.setdefault("GALLERY_IMAGE_CACHE_DIR", os.path.join(_scratch, "images"))
+os.environ.setdefault("GALLERY_BUNDLE_DIR", os.path.join(_scratch, "bundles"))
+os.environ.setdefault("GALLERY_SNAPSHOT_DIR", os.path.join(_scratch, "snapshots"))
+os.environ.setdefault("GALLERY_PARSE_WORKERS", "0")
+
+
+def _jpeg(width=64, height=48):
+    from PIL import Image
+
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 80, 40)).save(out, format="JPEG")
+    return out.getvalue()
+
+
+class ImageHost:
+    """A local stand-in for an image host.
+
+    ``/img/<name>.jpg`` serves a JPEG, ``/missing/...`` a 404,
+    ``/page/...`` an HTML page with status 200 (a soft 404) and
+    ``/nohead/...`` a JPEG that answers HEAD with 405. Every request is
+    recorded as ``(method, path)``.
+    """
+
+    def __init__(self):
+        self.image = _jpeg()
+        self.requests = []
+        self.in_flight = self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _handler(self):
+        host = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self._respond(body=False)
+
+            def do_GET(self):
+                self._respond(body=True)
+
+            def _respond(self, body):
+                with host._lock:
+                    host.requests.append((self.command, self.path))
+                    host.in_flight += 1
+                    host.max_in_flight = max(host.max_in_flight, host.in_flight)
+                try:
+                    if self.path.startswith("/missing/"):
+                        status, content_type, content = 404, "text/plain", b"not found"
+                    elif self.path.startswith("/page/"):
+                        status, content_type, content = 200, "text/html", b"<html><body>Not found</body></html>"
+                    elif self.path.startswith("/nohead/") and not body:
+                        status, content_type, content = 405, "text/plain", b""
+                    else:
+                        status, content_type, content = 200, "image/jpeg", host.image
+                    self.send_response(status)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(content)))
+                    self.end_headers()
+                    if body:
+                        self.wfile.write(content)
+                finally:
+                    with host._lock:
+                        host.in_flight -= 1
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def image_host():
+    host = ImageHost().start()
+    yield host
+    host.stop()
@@ -0,0 +1,68 @@
+import zipfile
+
+import pytest
+import requests
+
+from bundle import IMAGES_DIR, compile_bundle, open_bundle
+from images import ImageCache, image_cache, image_prefetcher
+
+WIDTHS = (150, 400)
+
+
+@pytest.fixture
+def catalog_csv(image_host):
+    rows = [
+        ("Lamp", f"{image_host.url}/img/lamp.jpg"),
+        ("Chair", f"{image_host.url}/missing/chair.jpg"),
+        ("Table", f"{image_host.url}/page/table.jpg"),
+        ("Shelf", "ftp://example.com/shelf.jpg"),
+        ("Desk", f"{image_host.url}/img/desk.jpg"),
+    ]
+    lines = ["name,image,details,price"] + [f"{name},{link},About the {name},100 SAR" for name, link in rows]
+    return ("\n".join(lines) + "\n").encode()
+
+
+@pytest.fixture
+def bundle_path(image_host, catalog_csv, tmp_path):
+    path = tmp_path / "products.gallery"
+    report = compile_bundle(catalog_csv, "products.csv", str(path), widths=WIDTHS, workers=4)
+    return path, report
+
+
+def test_report_lists_broken_links(image_host, bundle_path):
+    _, report = bundle_path
+    assert report["rows"] == 5
+    assert report["images"] == {"ok": 2, "failed": 2}
+    problems = {(problem["row"], problem["problem"]) for problem in report["problems"]}
+    assert problems == {(1, "download_failed"), (2, "download_failed"), (3, "not_http")}
+    assert "404" in next(problem["error"] for problem in report["problems"] if problem["row"] == 1)
+
+
+def test_bundle_holds_every_width_of_the_working_images(image_host, bundle_path):
+    path, _ = bundle_path
+    with zipfile.ZipFile(path) as bundle:
+        names = set(bundle.namelist())
+    for link in (f"{image_host.url}/img/lamp.jpg", f"{image_host.url}/img/desk.jpg"):
+        for width in WIDTHS:
+            assert f"{IMAGES_DIR}/{ImageCache.key(link, width)}" in names
+    assert not any(ImageCache.key(f"{image_host.url}/page/table.jpg", width) in name
+                   for name in names for width in WIDTHS)
+
+
+def test_opened_bundle_serves_images_without_network(image_host, bundle_path, monkeypatch):
+    path, _ = bundle_path
+    image_host.stop()
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("the bundle's images should not be downloaded")
+
+    monkeypatch.setattr(requests.Session, "send", no_network)
+    catalog, report = open_bundle(path.read_bytes())
+
+    assert len(catalog) == report["rows"] == 5
+    links = catalog.column("image link").to_pylist()
+    assert links[1] is None and links[2] is None  # Cleared, so the gallery shows its placeholder
+    for link in (links[0], links[4]):
+        for width in WIDTHS:
+            assert image_cache.has(link, width)
+            assert image_prefetcher.fetch(link, width) is not None
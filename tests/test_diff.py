@@ -0,0 +1,46 @@
+import pyarrow as pa
+
+from catalog import Catalog
+from diff import diff_catalogs
+from pricing import with_price_columns
+
+ROWS = {
+    "name": ["Lamp", "Chair", "Table", "Shelf"],
+    "image link": ["http://example.com/image.jpg"] * 4,
+    "details": ["Bright", "Soft", "Oak", "Tall"],
+    "price": ["10 SAR", "20 SAR", "30 SAR", "40 SAR"],
+    "stock": [1, 2, None, 4],
+}
+
+
+def compacted(rows):
+    catalog = Catalog(with_price_columns(pa.table(rows)))
+    catalog.compact()
+    return catalog
+
+
+def with_row(rows, row):
+    return {column: values + [row[column]] for column, values in rows.items()}
+
+
+def test_insert_that_changes_compacted_types_leaves_other_rows_unchanged():
+    # The new row widens "stock" past int8 and needs a float64 price, so compaction stores both differently
+    old = compacted(ROWS)
+    new = compacted(with_row(ROWS, {"name": "Desk", "image link": "http://example.com/desk.jpg",
+                                    "details": "Wide", "price": "0.1 SAR", "stock": 100000}))
+    assert old.table.schema.field("stock").type != new.table.schema.field("stock").type
+
+    diff = diff_catalogs(old, new)
+    assert (diff.inserted, diff.updated, diff.deleted) == (1, 0, 0)
+
+
+def test_changed_source_column_is_an_update():
+    changed = dict(ROWS, details=["Bright", "Dim", "Oak", "Tall"])
+    diff = diff_catalogs(compacted(ROWS), compacted(changed))
+    assert (diff.inserted, diff.updated, diff.deleted) == (0, 1, 0)
+    assert diff.changed.tolist() == [False, True, False, False]
+
+
+def test_null_differs_from_zero():
+    diff = diff_catalogs(compacted(ROWS), compacted(dict(ROWS, stock=[1, 2, 0, 4])))
+    assert diff.updated == 1
@@ -0,0 +1,50 @@
+import io
+import os
+import signal
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import ingest
+
+
+def workbook(rows):
+    from openpyxl import Workbook
+
+    book = Workbook()
+    sheet = book.active
+    sheet.append(["name", "image", "details"])
+    for row in range(rows):
+        sheet.append([f"Product {row}", f"http://example.com/{row}.jpg", "About it"])
+    out = io.BytesIO()
+    book.save(out)
+    out.name = "products.xlsx"
+    out.seek(0)
+    return out
+
+
+@pytest.fixture
+def parse_pool(monkeypatch):
+    monkeypatch.setattr(ingest, "PARSE_WORKERS", 1)
+    yield
+    if ingest._pool is not None:
+        ingest._reset_parse_pool(ingest._pool)
+
+
+def parse(file):
+    return sum(len(table) for table in ingest.iter_xlsx_tables(file, chunk_rows=10))
+
+
+def test_workbook_is_parsed_in_a_worker(parse_pool):
+    assert parse(workbook(25)) == 25
+
+
+def test_parse_recovers_from_a_killed_worker(parse_pool):
+    worker, _ = ingest._submit(os.getpid)
+    running, _ = ingest._submit(time.sleep, 30)
+    os.kill(worker.result(timeout=60), signal.SIGKILL)
+    with pytest.raises(BrokenProcessPool):
+        running.result(timeout=60)
+
+    assert parse(workbook(25)) == 25
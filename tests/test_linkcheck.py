@@ -0,0 +1,98 @@
+import pyarrow as pa
+import pytest
+
+from catalog import Catalog
+from concurrency import HostLimiter
+from linkcheck import BROKEN, OK, LinkChecker
+
+
+def catalog_of(links):
+    return Catalog(pa.table({
+        "name": [f"Product {row}" for row in range(len(links))],
+        "image link": pa.array(links, pa.string()),
+        "details": ["About it"] * len(links),
+    }))
+
+
+def check(checker, catalog):
+    health = checker.start(catalog)
+    assert health.done.wait(10)
+    return health
+
+
+@pytest.fixture
+def checker():
+    return LinkChecker(workers=4, limiter=HostLimiter(2), timeout=(2, 2))
+
+
+def test_statuses(image_host, checker):
+    links = [
+        f"{image_host.url}/img/ok.jpg",
+        f"{image_host.url}/missing/gone.jpg",
+        f"{image_host.url}/page/soft-404.jpg",  # An HTML page with status 200
+        f"{image_host.url}/nohead/get-only.jpg",  # Answers HEAD with 405
+        "ftp://example.com/file.jpg",
+        None,
+        "http://[bad",  # urlsplit raises ValueError
+        f"http://{'a' * 70}.example/label-too-long.jpg",  # urllib3 raises LocationParseError
+        f"{image_host.url}/img/ok.jpg",
+    ]
+    health = check(checker, catalog_of(links))
+    assert health.status.tolist() == [OK, BROKEN, BROKEN, OK, BROKEN, BROKEN, BROKEN, BROKEN, OK]
+    assert [health.usable(row) for row in (0, 1, 3, 5)] == [True, False, True, False]
+    assert health.broken == 6
+    assert ("GET", "/nohead/get-only.jpg") in image_host.requests
+
+
+def test_malformed_links_are_broken_not_errors(checker):
+    assert checker.check("http://[bad") == BROKEN
+    assert checker.check(f"http://{'a' * 70}.example/label-too-long.jpg") == BROKEN
+
+
+def test_each_link_is_requested_once_and_cached(image_host, checker):
+    links = [f"{image_host.url}/img/{row % 20}.jpg" for row in range(200)]
+    check(checker, catalog_of(links))
+    assert len(image_host.requests) == 20
+    assert image_host.max_in_flight == 1  # One of the host's two slots is left to image prefetch
+
+    health = check(checker, catalog_of(links[::-1]))
+    assert len(image_host.requests) == 20
+    assert health.broken == 0
+
+
+def test_disabled_checker_leaves_rows_usable(image_host):
+    health = check(LinkChecker(workers=0), catalog_of([f"{image_host.url}/missing/gone.jpg", "not a link"]))
+    assert [health.usable(row) for row in range(2)] == [True, False]
+    assert not image_host.requests
+
+
+def test_rows_share_their_links_status(image_host, checker):
+    links = [f"{image_host.url}/img/{row % 3}.jpg" if row % 5 else None for row in range(30)]
+    health = check(checker, catalog_of(links))
+    assert len(health.url_status) == 3 and health.codes.dtype == "int32"
+    assert health.broken == 6  # The rows without a link
+
+
+def test_check_stops_when_the_catalog_is_dropped(image_host, checker):
+    links = [f"{image_host.url}/img/{row}.jpg" for row in range(2000)]
+    catalog = catalog_of(links)
+    health = checker.start(catalog)
+    del catalog
+    assert health.done.wait(10)
+    assert len(image_host.requests) < 1000
+
+
+def test_check_stops_when_the_catalog_is_cancelled(image_host, checker):
+    catalog = catalog_of([f"{image_host.url}/img/{row}.jpg" for row in range(2000)])
+    health = checker.start(catalog)
+    catalog.cancelled = True
+    assert health.done.wait(10)
+    assert len(image_host.requests) < 1000
+    assert all(health.usable(row) for row in range(len(catalog)))  # Unchecked rows stay usable
+
+
+def test_check_ends_cleanly_once_its_pool_is_shut_down(image_host, checker):
+    checker._executor.shutdown()
+    health = check(checker, catalog_of([f"{image_host.url}/img/ok.jpg", None]))
+    assert [health.usable(row) for row in range(2)] == [True, False]
+    assert not image_host.requests
@@ -0,0 +1,59 @@
+import pyarrow as pa
+import pytest
+
+from catalog import Catalog
+from pricing import PriceIndex, parse_prices, with_price_columns
+
+
+@pytest.mark.parametrize("price, amount, currency", [
+    ("2115 SAR", 2115, "SAR"),
+    ("SAR 250", 250, "SAR"),
+    ("$1,250.50", 1250.5, "$"),
+    ("12,500 sar", 12500, "SAR"),
+    ("1,234,567", 1234567, None),
+    ("12€", 12, "€"),
+    ("US$ 12", 12, "US$"),
+    ("٢٥٠ ر.س", 250, "ر.س"),
+    ("٢٬٥٠٠٫٥", 2500.5, None),
+    ("  99.95  ", 99.95, None),
+])
+def test_parses(price, amount, currency):
+    amounts, currencies = parse_prices(pa.array([price]))
+    assert amounts.to_pylist() == [pytest.approx(amount)]
+    assert currencies.to_pylist() == [currency]
+
+
+@pytest.mark.parametrize("price", [
+    "1,5 EUR",  # Decimal comma
+    "1,50 EUR",
+    "1.250,50 EUR",
+    "12,50,000",
+    "-5 SAR",
+    "+5 SAR",
+    "10 SAR extra",
+    "call us",
+    "",
+    None,
+])
+def test_leaves_unparsed(price):
+    amounts, currencies = parse_prices(pa.array([price], pa.string()))
+    assert amounts.to_pylist() == [None]
+    assert currencies.to_pylist() == [None]
+
+
+def test_price_index_without_any_parsed_price():
+    catalog = Catalog(with_price_columns(pa.table({"price": pa.array(["call us", "1,5 EUR", None], pa.string())})))
+    index = PriceIndex.build(catalog)
+    assert len(index) == 0 and index.unparsed == 2
+    assert index.min is None and index.max is None
+    assert index.range(index.min, index.max).tolist() == []
+    assert index.range(None, None, descending=True).tolist() == []
+
+
+def test_price_index_range():
+    catalog = Catalog(with_price_columns(pa.table({"price": ["30 SAR", "n/a", "10 SAR", "20 SAR"]})))
+    index = PriceIndex.build(catalog)
+    assert len(index) == 3
+    assert index.range(10, 20).tolist() == [2, 3]
+    assert index.range(15, None, descending=True).tolist() == [0, 3]
+    assert index.range(None, None).tolist() == [2, 3, 0]
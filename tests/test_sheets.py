@@ -0,0 +1,164 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from sheets import SheetFetcher
+
+
+class SheetHost:
+    """A local stand-in for the gviz CSV endpoint.
+
+    ``/<sheet id>/gviz?sheet=<name>`` serves ``sheets[name]`` with an ETag
+    derived from its version, answering a matching ``If-None-Match`` with
+    304, after ``delay`` seconds. Every request is recorded as ``(sheet
+    name, If-None-Match header)``.
+    """
+
+    def __init__(self, delay=0):
+        self.sheets = {}
+        self.versions = {}
+        self.delay = delay
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def publish(self, sheet_name, csv):
+        with self._lock:
+            self.sheets[sheet_name] = csv.encode()
+            self.versions[sheet_name] = self.versions.get(sheet_name, 0) + 1
+
+    def _handler(self):
+        host = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                sheet_name = parse_qs(urlsplit(self.path).query)["sheet"][0]
+                with host._lock:
+                    host.requests.append((sheet_name, self.headers.get("If-None-Match")))
+                    body, etag = host.sheets.get(sheet_name), f'"v{host.versions.get(sheet_name)}"'
+                time.sleep(host.delay)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                elif self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                else:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/csv")
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def sheet_host():
+    host = SheetHost().start()
+    host.publish("Products", "name,image,details\nLamp,http://example.com/lamp.jpg,Bright\n")
+    yield host
+    host.stop()
+
+
+def fetcher_for(host, ttl=60):
+    return SheetFetcher(url_template=f"{host.url}/{{sheet_id}}/gviz?sheet={{sheet_name}}", ttl=ttl)
+
+
+class Parser:
+    """Records each parse; results are fresh objects so reuse can be told apart from re-parsing."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, content):
+        self.calls += 1
+        return {"content": content}
+
+
+def test_result_is_reused_within_ttl(sheet_host):
+    fetcher, parse = fetcher_for(sheet_host), Parser()
+    first = fetcher.fetch("sheet", "Products", parse)
+    assert fetcher.fetch("sheet", "Products", parse) is first
+    assert len(sheet_host.requests) == 1 and parse.calls == 1
+    assert fetcher.stats()["fresh_hits"] == 1
+
+
+def test_stale_result_is_revalidated_with_its_etag(sheet_host):
+    fetcher, parse = fetcher_for(sheet_host, ttl=0), Parser()
+    first = fetcher.fetch("sheet", "Products", parse)
+    assert fetcher.fetch("sheet", "Products", parse) is first  # 304: not downloaded or parsed again
+    assert sheet_host.requests == [("Products", None), ("Products", '"v1"')]
+    assert parse.calls == 1 and fetcher.stats()["not_modified"] == 1
+
+    sheet_host.publish("Products", "name,image,details\nDesk,http://example.com/desk.jpg,Oak\n")
+    changed = fetcher.fetch("sheet", "Products", parse)
+    assert b"Desk" in changed["content"] and parse.calls == 2
+
+
+def test_revalidate_checks_a_fresh_result(sheet_host):
+    fetcher, parse = fetcher_for(sheet_host), Parser()
+    fetcher.fetch("sheet", "Products", parse)
+    fetcher.fetch("sheet", "Products", parse, revalidate=True)
+    assert sheet_host.requests[-1] == ("Products", '"v1"') and parse.calls == 1
+
+
+def test_seeded_result_is_revalidated_before_use(sheet_host):
+    fetcher, parse = fetcher_for(sheet_host), Parser()
+    restored = {"content": b"from a snapshot"}
+    fetcher.seed("sheet", "Products", restored, etag='"v1"')
+    assert fetcher.fetch("sheet", "Products", parse) is restored
+    assert sheet_host.requests == [("Products", '"v1"')] and parse.calls == 0
+
+
+def test_concurrent_fetches_share_one_request(sheet_host):
+    sheet_host.delay = 0.3
+    fetcher, parse = fetcher_for(sheet_host), Parser()
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(fetcher.fetch("sheet", "Products", parse))) for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(sheet_host.requests) == 1 and parse.calls == 1
+    assert all(result is results[0] for result in results)
+    assert fetcher.stats()["coalesced"] == 4
+
+
+def test_variants_are_cached_separately(sheet_host):
+    fetcher = fetcher_for(sheet_host)
+    plain = fetcher.fetch("sheet", "Products", lambda content: "plain", variant="")
+    priced = fetcher.fetch("sheet", "Products", lambda content: "priced", variant="prices")
+    assert (plain, priced) == ("plain", "priced")
+    assert fetcher.fetch("sheet", "Products", lambda content: "other", variant="prices") == "priced"
+
+    fetcher.invalidate("sheet", "Products")
+    assert not fetcher.has("sheet", "Products") and not fetcher.has("sheet", "Products", "prices")
+
+
+def test_missing_sheet_raises(sheet_host):
+    fetcher = fetcher_for(sheet_host)
+    with pytest.raises(Exception):
+        fetcher.fetch("sheet", "Nope", Parser())
+    assert not fetcher.has("sheet", "Nope")
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+TIMING_LOG = os.environ.get("GALLERY_TIMING_LOG", "")  # path of a JSONL log of every sample; off when unset
+TIMING_LOG_MAX_BYTES = int(float(os.environ.get("GALLERY_TIMING_LOG_MB", 10)) * 1024 * 1024)  # then rotated to .1
+ADMIN_PANEL = os.environ.get("GALLERY_ADMIN_PANEL", "") not in ("", "0")
+SAMPLES_KEPT = 2000  # per phase, for the percentiles
+
+
+def _session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+
+class PhaseTimer:
+    """Collect wall-clock durations of named phases.
+
+    The most recent samples are kept in memory for the p50/p95 summary.
+    With a ``log_path`` every sample is also appended to a JSONL log (one
+    ``{"ts", "phase", "ms", "session", ...}`` object per line), which is
+    rotated to ``<log_path>.1`` once it reaches ``log_max_bytes``.
+    """
+
+    def __init__(self, log_path=TIMING_LOG, samples_kept=SAMPLES_KEPT, log_max_bytes=TIMING_LOG_MAX_BYTES):
+        self.log_path = log_path
+        self.log_max_bytes = log_max_bytes
+        self._log = None  # Open while logging, rather than reopened for every sample
+        self._samples = defaultdict(lambda: deque(maxlen=samples_kept))
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timed(self, phase, **fields):
+        """Time the enclosed block (or decorated function) as ``phase``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, (time.perf_counter() - start) * 1000, **fields)
+
+    def record(self, phase, ms, **fields):
+        with self._lock:
+            self._samples[phase].append(ms)
+            if self.log_path:
+                entry = {
+                    "ts": round(time.time(), 3), "phase": phase, "ms": round(ms, 3), "session": _session_id(), **fields
+                }
+                try:
+                    self._write(json.dumps(entry, ensure_ascii=False) + "\n")
+                except OSError:
+                    self.log_path = None  # unwritable location; keep the in-memory samples only
+
+    def _write(self, line):
+        if self._log is None:
+            self._log = open(self.log_path, "a", encoding="utf-8", buffering=1)
+        self._log.write(line)
+        if self._log.tell() >= self.log_max_bytes:
+            self._log.close()
+            self._log = None
+            os.replace(self.log_path, self.log_path + ".1")
+
+    def summary(self):
+        """Return ``{phase: {"count", "p50", "p95", "max"}}`` in milliseconds."""
+        with self._lock:
+            samples = {phase: np.array(values) for phase, values in self._samples.items()}
+        return {
+            phase: {
+                "count": len(values),
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95)),
+                "max": float(values.max()),
+            }
+            for phase, values in sorted(samples.items()) if len(values)
+        }
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+
+def session_memory(products):
+    """Bytes of the catalog behind a session's ``products`` (shared with other sessions)."""
+    return getattr(products, "nbytes", 0)
+
+
+def show_timing_panel(products):
+    """Sidebar panel with per-phase percentiles and this session's catalog size.
+
+    Only shown when the ``GALLERY_ADMIN_PANEL`` environment variable is set.
+    """
+    if not ADMIN_PANEL:
+        return
+    import streamlit as st
+
+    with st.sidebar.expander("⏱️ Timings"):
+        summary = phase_timer.summary()
+        if summary:
+            st.dataframe(
+                [{"phase": phase, "runs": s["count"], "p50 ms": round(s["p50"], 1),
+                  "p95 ms": round(s["p95"], 1), "max ms": round(s["max"], 1)} for phase, s in summary.items()],
+                hide_index=True,
+            )
+        else:
+            st.caption("No timings recorded yet.")
+        from registry import catalog_registry
+
+        shared = catalog_registry.stats()
+        compacted_from = getattr(products, "compacted_from", None)
+        st.caption(f"Session products: {session_memory(products) / 1024:,.0f} KB"
+                   + (f" (compacted from {compacted_from / 1024:,.0f} KB)" if compacted_from else ""))
+        st.caption(f"Shared catalogs: {shared['catalogs']} ({shared['bytes'] / (1024 * 1024):,.1f} MB), "
+                   f"held by {shared['handles']} sessions")
+        if phase_timer.log_path:
+            st.caption(f"Log: {phase_timer.log_path}")
+
+
+phase_timer = PhaseTimer()
+timed = phase_timer.timed
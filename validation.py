@@ -0,0 +1,152 @@
+"""Column mapping and validation rules shared by the gallery and the bundle compiler.
+
+Nothing here touches Streamlit, so it is safe in worker threads and
+command-line tools; callers turn ``InvalidCatalog`` into their own messages.
+"""
+import functools
+import io
+
+import pyarrow as pa
+
+from catalog import SOURCE_COLUMN, Catalog, merge_catalogs
+from concurrency import run_concurrently
+from ingest import chunk_table, iter_workbook_chunks, rename_columns, workbook_sheet_names
+
+COLUMN_MAPPING = {"image": "image link"}  # Handle 'image' instead of 'image link'
+REQUIRED_COLUMNS = ("name", "image link", "details")
+
+
+class InvalidCatalog(ValueError):
+    """The data can't be shown; ``label`` names the message in the front end's labels."""
+
+    def __init__(self, label, **fields):
+        super().__init__(label, fields)
+        self.label = label
+        self.fields = fields
+
+    def message(self, labels):
+        return labels[self.label].format(**self.fields)
+
+
+def build_catalog(chunk, required_columns=REQUIRED_COLUMNS, transform=None, complete=True):
+    """Standardize and validate the columns of a dataframe (or Arrow table) and build a catalog from it.
+
+    Raises ``InvalidCatalog`` when the data is not usable.
+    """
+    # Keep the data column-wise; rows are built only when displayed
+    table = chunk_table(rename_columns(chunk, COLUMN_MAPPING))
+    validate_table(table, required_columns)
+
+    products = Catalog(transform(table) if transform is not None else table, complete=complete)
+    if complete:
+        products.compact()
+    return products
+
+
+def validate_table(table, required_columns=REQUIRED_COLUMNS):
+    """Raise ``InvalidCatalog`` unless the (renamed) table has the required columns and some rows."""
+    missing_columns = [column for column in required_columns if column not in table.column_names]
+    if missing_columns:
+        raise InvalidCatalog("missing_columns", columns=", ".join(missing_columns))
+    if not table.num_rows:
+        raise InvalidCatalog("empty")
+
+
+def parse_workbook_sheet(data, sheet_name, required_columns=REQUIRED_COLUMNS, transform=None):
+    """Parse one sheet of a workbook's bytes into a complete catalog (in a worker process when configured)."""
+    chunks = iter_workbook_chunks(io.BytesIO(data), sheet_name=sheet_name)
+    try:
+        catalog = build_catalog(next(chunks), required_columns, transform, complete=False)
+        for chunk in chunks:
+            table = chunk_table(rename_columns(chunk, COLUMN_MAPPING))
+            catalog.append(transform(table) if transform is not None else table)
+    finally:
+        chunks.close()
+    catalog.compact()
+    catalog.finish()
+    return catalog
+
+
+def parse_workbook_sheets(data, sheet_names, required_columns=REQUIRED_COLUMNS, transform=None):
+    """Parse several sheets concurrently; returns ``{sheet: catalog or the exception it raised}``."""
+    return run_concurrently(
+        lambda sheet_name: parse_workbook_sheet(data, sheet_name, required_columns, transform), sheet_names
+    )
+
+
+def read_workbook_sheets(data, sheet_names, required_columns=REQUIRED_COLUMNS):
+    """Stream several sheets of a workbook as the chunks of one catalog.
+
+    Every sheet's first chunk is read concurrently up front, which starts
+    all of them parsing (in the worker pool when configured) and tells
+    which sheets lack the required columns before any row is shown.
+    Returns ``(first, chunks, expected_rows, skipped)``: the first chunk
+    and an iterator over the rest, in sheet order, each renamed by
+    ``COLUMN_MAPPING`` and with a ``source`` column naming its sheet; the
+    usable sheets' row count, or None when the reader doesn't tell; and
+    ``{sheet: exception}`` for the sheets that can't be used. ``first``
+    and ``chunks`` are None when no sheet is usable.
+    """
+    sizes = {}
+
+    def first_chunk(sheet_name):
+        chunks = iter_workbook_chunks(
+            io.BytesIO(data), sheet_name=sheet_name, on_size=functools.partial(sizes.__setitem__, sheet_name)
+        )
+        try:
+            first = chunk_table(rename_columns(next(chunks), COLUMN_MAPPING))
+            validate_table(first, required_columns)
+        except BaseException:
+            chunks.close()
+            raise
+        return first, chunks
+
+    sheets = run_concurrently(first_chunk, sheet_names)
+    usable = {name: result for name, result in sheets.items() if not isinstance(result, Exception)}
+    skipped = {name: result for name, result in sheets.items() if isinstance(result, Exception)}
+    if not usable:
+        return None, None, None, skipped
+    expected_rows = sum(sizes[name] for name in usable) if all(name in sizes for name in usable) else None
+    chunks = _sheet_chunks(usable)
+    return next(chunks), chunks, expected_rows, skipped
+
+
+def _sheet_chunks(sheets):
+    try:
+        for sheet_name, (first, chunks) in sheets.items():
+            source = functools.partial(_with_source, sheet_name=sheet_name)
+            yield source(first)
+            for chunk in chunks:
+                yield source(chunk_table(rename_columns(chunk, COLUMN_MAPPING)))
+    finally:
+        for _, chunks in sheets.values():
+            chunks.close()  # Stops the workers of sheets not streamed yet
+
+
+def _with_source(table, sheet_name):
+    if SOURCE_COLUMN in table.column_names:
+        table = table.drop_columns([SOURCE_COLUMN])
+    return table.append_column(SOURCE_COLUMN, pa.array([sheet_name] * table.num_rows, pa.string()))
+
+
+def read_catalog(data, file_name, required_columns=REQUIRED_COLUMNS, transform=None):
+    """Parse a whole CSV or XLSX file by the same rules as an upload.
+
+    Workbooks with several sheets are merged with a ``source`` column.
+    Returns ``(catalog, skipped)``, where ``skipped`` maps sheets without
+    the required columns to their ``InvalidCatalog``.
+    """
+    if file_name.lower().endswith(".csv"):
+        import pandas as pd
+
+        return build_catalog(pd.read_csv(io.BytesIO(data), dtype=str), required_columns, transform), {}
+    sheet_names = workbook_sheet_names(io.BytesIO(data))
+    sheets = parse_workbook_sheets(data, sheet_names, required_columns, transform)
+    parsed = {name: result for name, result in sheets.items() if isinstance(result, Catalog)}
+    failed = {name: result for name, result in sheets.items() if not isinstance(result, Catalog)}
+    for error in failed.values():
+        if not parsed or not isinstance(error, InvalidCatalog):
+            raise error
+    if len(sheet_names) == 1:
+        return parsed[sheet_names[0]], {}
+    return merge_catalogs(parsed), failed